@@ -30,6 +30,10 @@ LOCATION = {
 API_URL = "https://api.open-meteo.com/v1/forecast"
 API_MODEL = "meteoswiss_icon_ch1"  # MeteoSwiss ICON CH1 - supports cloud_base
 API_TIMEOUT = 30
+API_MAX_RESPONSE_BYTES = 5_000_000  # Obergrenze pro Open-Meteo Antwort (Schutz vor Speicher-Spitzen)
+API_CACHE_DURATION = 900  # Sekunden: identische Open-Meteo Abfragen werden 15 Min wiederverwendet
+API_CACHE_DIRNAME = "openmeteo_cache"  # Persistenter Antwort-Cache (überlebt Prozess-Neustarts, im Datenverzeichnis)
+API_CACHE_STALE_IF_ERROR = 6 * 3600    # Sekunden: bei API-Fehlern darf eine ältere gecachte Antwort verwendet werden
 FORECAST_DAYS = 3
 TIMEZONE = "Europe/Zurich"
 # HINWEIS: Die Cron-Job Zeit wird in vercel.json konfiguriert!
@@ -418,6 +422,26 @@ WICHTIG FÜR DIE ANALYSE:
 
 Antworte mit dem geforderten JSON-Format."""
 
+# ============================================================================
+# LLM AUSFÜHRUNGS-KONFIGURATION
+# ============================================================================
+
+LLM_MAX_CONCURRENCY = 3  # Max. gleichzeitige OpenAI-Requests (Tage werden parallel analysiert)
+LLM_BATCH_DAYS = True    # Mehrere Tage in einem einzigen Request analysieren (nur Modelle mit JSON-Mode, Fallback pro Tag)
+LLM_STREAM = True        # Antwort per Server-Sent Events streamen (Parsen überlappt mit der Übertragung)
+PROMPT_MAX_HOURS = 12    # Max. Stundenzeilen pro Tag im Prompt; bei mehr Flugstunden wird gleichmässig ausgedünnt
+PROMPT_INCLUDE_SUNSHINE = False  # Sonnenscheindauer als eigene Prompt-Spalte (steckt bereits im THERMIK-PROXY, CAPE zeigt den Tagesgang)
+LLM_BATCH_API_POLL_INTERVAL = 30     # Sekunden zwischen Status-Abfragen der OpenAI Batch API (CLI --batch)
+LLM_BATCH_API_MAX_WAIT = 24 * 3600   # Max. Wartezeit auf einen Batch (entspricht completion_window 24h)
+LLM_CACHE_TTL = 21600    # Sekunden: LLM-Ergebnisse für (fast) identische Wetterdaten werden 6h wiederverwendet (0 = aus)
+LLM_CACHE_FILENAME = "llm_cache.jsonl"
+LLM_EXACT_CACHE_DIRNAME = "llm_exact_cache"  # Exakter Cache: ein File pro identischem Prompt (SHA-256)
+LLM_EXACT_CACHE_MAX_ENTRIES = 500            # Älteste Einträge (mtime) werden darüber hinaus gelöscht
+
+# Offensichtlich unfliegbare Tage werden ohne LLM-Call direkt als DANGEROUS bewertet
+NO_FLY_MAX_GUST = 60       # km/h: Böen über diesem Wert in irgendeiner Flugstunde
+NO_FLY_TOTAL_PRECIP = 20   # mm: Niederschlags-Summe über alle Flugstunden des Tages
+
 # ============================================================================
 # REGIONEN-KONFIGURATION (29 Thermikregionen)
 # IDs, lat/lon und elevation_ref stammen aus regionen_referenzpunkte.geojson
@@ -425,6 +449,9 @@ Antworte mit dem geforderten JSON-Format."""
 # Jede Region hat genau ein Polygon in regionen_xc_thermik.geojson
 # ============================================================================
 
+REGIONS_BATCH_SIZE = 50  # Max. Regionen pro Open-Meteo Request (komma-separierte Koordinaten, URL-Länge begrenzt)
+REGIONS_PROCESS_POOL_MIN = 8  # Mit fetch_regions.py --processes: ab so vielen Regionen auf mehrere Prozesse verteilen
+
 REGIONS = [
     # --- Jura ---
     {"id": "jura_west", "name": "Jura West", "lat": 46.8286, "lon": 6.5401, "elevation_ref": 1200},
@@ -27,6 +27,54 @@ def load_weather_data(json_path):
         return None
 
 
+# Bewölkungs-/Niederschlagszeilen der Stundenanzeige: (Label, Parameter, Format), pro Stunde nur .format
+_CLOUD_ROWS = (
+    ("Bewölkungshöhe:          ", "cloud_base", "{:.0f}m"),
+    ("Bewölkungsgrad (gesamt): ", "cloud_cover", "{:.0f}%"),
+    ("Bewölkung tief:          ", "cloud_cover_low", "{:.0f}%"),
+    ("Bewölkung mittel:        ", "cloud_cover_mid", "{:.0f}%"),
+    ("Bewölkung hoch:          ", "cloud_cover_high", "{:.0f}%"),
+    ("Niederschlag (gesamt):   ", "precipitation", "{:.2f}mm"),
+    ("Regen:                  ", "rain", "{:.2f}mm"),
+    ("Niederschlagswahrscheinlichkeit: ", "precipitation_probability", "{:.0f}%"),
+)
+
+
+def _row(label, value, fmt):
+    """Eine Anzeigezeile: formatierter Wert oder N/A."""
+    return label + (fmt.format(value) if value is not None else "N/A")
+
+
+def _format_hour_block(location_name, time_display, values):
+    """Formatiert den Anzeigeblock einer Stunde als einen String (ein print pro Stunde)."""
+    get = values.get
+    ws = get("wind_speed_10m")
+    wg = get("wind_gusts_10m")
+    sunshine = get("sunshine_duration")
+
+    lines = [
+        f"\nStandort: {location_name} | Zeitstempel: {time_display}",
+        "-" * 80,
+        _row("Temperatur:              ", get("temperature_2m"), "{:.1f}°C"),
+        f"Windgeschwindigkeit:     {ws * 3.6:.1f}km/h ({ws:.1f}m/s)" if ws is not None else "Windgeschwindigkeit:     N/A",
+        _row("Windrichtung:            ", get("wind_direction_10m"), "{:.0f}°"),
+    ]
+    if wg is not None:
+        lines.append(f"Windböen:                {wg * 3.6:.1f}km/h ({wg:.1f}m/s)")
+        if ws is not None and ws > 0:
+            lines.append(f"Böen-Faktor:            {wg / ws:.2f}x")
+    else:
+        lines.append("Windböen:                N/A")
+
+    lines.append(_row("CAPE (Thermik):         ", get("cape"), "{:.0f} J/kg"))
+    if sunshine is not None:
+        lines.append(f"Sonnenscheindauer:       {sunshine / 3600:.2f}h ({sunshine:.0f}s)")
+    else:
+        lines.append("Sonnenscheindauer:       N/A")
+    lines.extend(_row(label, get(key), fmt) for label, key, fmt in _CLOUD_ROWS)
+    return "\n".join(lines)
+
+
 def display_weather_for_location(location_name, weather_data):
     """Zeigt Wetterdaten für einen Standort an."""
     if not weather_data:
@@ -54,101 +102,27 @@ def display_weather_for_location(location_name, weather_data):
         print(f"Windrichtung/Ausrichtung: {windrichtung}")
     print(f"{'='*60}\n")
     
-    # Gruppiere nach Tagen
+    # Gruppiere nach Tagen. Zeitstempel sind "YYYY-MM-DDTHH:MM" (optional mit "Z"):
+    # Datum und Uhrzeit per Slicing, einmal global sortiert (Tage bleiben chronologisch)
     days_data = {}
-    for time_str, values in hourly_data.items():
-        try:
-            # Handle both "2026-01-18T00:00Z" and "2026-01-18T00:00" formats
-            if time_str.endswith('Z'):
-                dt = datetime.fromisoformat(time_str.replace("Z", "+00:00"))
-            else:
-                dt = datetime.fromisoformat(time_str)
-            date_key = dt.strftime("%Y-%m-%d")
-            if date_key not in days_data:
-                days_data[date_key] = []
-            days_data[date_key].append((time_str, values))
-        except Exception as e:
-            print(f"[WARNING] Failed to parse timestamp {time_str}: {e}")
+    for time_str in sorted(hourly_data):
+        if len(time_str) < 16 or time_str[10] != 'T':
+            print(f"[WARNING] Failed to parse timestamp {time_str}")
             continue
+        days_data.setdefault(time_str[:10], []).append((time_str, hourly_data[time_str]))
     
     # Zeige alle Zeitstempel, gruppiert nach Tagen
-    for date_key in sorted(days_data.keys()):
-        day_timestamps = sorted(days_data[date_key], key=lambda x: x[0])
-        first_timestamp = day_timestamps[0][0]
-        if first_timestamp.endswith('Z'):
-            dt_first = datetime.fromisoformat(first_timestamp.replace("Z", "+00:00"))
-        else:
-            dt_first = datetime.fromisoformat(first_timestamp)
-        date_display = dt_first.strftime("%d.%m.%Y")
+    for date_key, day_timestamps in days_data.items():
+        date_display = datetime.strptime(date_key, "%Y-%m-%d").strftime("%d.%m.%Y")
         
         print(f"\n{'='*80}")
         print(f"Tag: {date_display}")
         print(f"{'='*80}")
         
         for time_str, values in day_timestamps:
-            if time_str.endswith('Z'):
-                dt = datetime.fromisoformat(time_str.replace("Z", "+00:00"))
-            else:
-                dt = datetime.fromisoformat(time_str)
-            time_display = dt.strftime("%H:%M")
-            
-            print(f"\nStandort: {location_name} | Zeitstempel: {time_display}")
-            print("-" * 80)
-            
-            temp = values.get("temperature_2m")
-            cb = values.get("cloud_base")
-            cc = values.get("cloud_cover")
-            ws = values.get("wind_speed_10m")
-            wd = values.get("wind_direction_10m")
-            wg = values.get("wind_gusts_10m")
-            prec = values.get("precipitation")
-            rain = values.get("rain")
-            prec_prob = values.get("precipitation_probability")
-            cc_low = values.get("cloud_cover_low")
-            cc_mid = values.get("cloud_cover_mid")
-            cc_high = values.get("cloud_cover_high")
-            sunshine = values.get("sunshine_duration")
-            cape = values.get("cape")
-            
-            print(f"Temperatur:              {temp:.1f}°C" if temp is not None else "Temperatur:              N/A")
-            
-            if ws is not None:
-                ws_kmh = ws * 3.6
-                print(f"Windgeschwindigkeit:     {ws_kmh:.1f}km/h ({ws:.1f}m/s)")
-            else:
-                print(f"Windgeschwindigkeit:     N/A")
-            print(f"Windrichtung:            {wd:.0f}°" if wd is not None else "Windrichtung:            N/A")
-            if wg is not None:
-                wg_kmh = wg * 3.6
-                print(f"Windböen:                {wg_kmh:.1f}km/h ({wg:.1f}m/s)")
-                if ws is not None and ws > 0:
-                    gust_factor = wg / ws
-                    print(f"Böen-Faktor:            {gust_factor:.2f}x")
-            else:
-                print(f"Windböen:                N/A")
-            
-            if cape is not None:
-                print(f"CAPE (Thermik):         {cape:.0f} J/kg")
-            else:
-                print(f"CAPE (Thermik):         N/A")
-            if sunshine is not None:
-                sunshine_hours = sunshine / 3600
-                print(f"Sonnenscheindauer:       {sunshine_hours:.2f}h ({sunshine:.0f}s)")
-            else:
-                print(f"Sonnenscheindauer:       N/A")
-            print(f"Bewölkungshöhe:          {cb:.0f}m" if cb is not None else "Bewölkungshöhe:          N/A")
-            
-            print(f"Bewölkungsgrad (gesamt): {cc:.0f}%" if cc is not None else "Bewölkungsgrad (gesamt): N/A")
-            print(f"Bewölkung tief:          {cc_low:.0f}%" if cc_low is not None else "Bewölkung tief:          N/A")
-            print(f"Bewölkung mittel:        {cc_mid:.0f}%" if cc_mid is not None else "Bewölkung mittel:        N/A")
-            print(f"Bewölkung hoch:          {cc_high:.0f}%" if cc_high is not None else "Bewölkung hoch:          N/A")
+            time_display = time_str[11:16]
             
-            print(f"Niederschlag (gesamt):   {prec:.2f}mm" if prec is not None else "Niederschlag (gesamt):   N/A")
-            if rain is not None:
-                print(f"Regen:                  {rain:.2f}mm")
-            else:
-                print(f"Regen:                  N/A")
-            print(f"Niederschlagswahrscheinlichkeit: {prec_prob:.0f}%" if prec_prob is not None else "Niederschlagswahrscheinlichkeit: N/A")
+            print(_format_hour_block(location_name, time_display, values))
     
     print(f"\n{'='*80}")
     print(f"[INFO] Gesamt {len(hourly_data)} Zeitstempel angezeigt")
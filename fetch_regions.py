@@ -1,13 +1,218 @@
+import heapq
 import json
+import multiprocessing
 import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from datetime import datetime
-import requests
 import config
+from fetch_weather import SESSION, column, pivot
+from json_helper import orjson  # optional (siehe json_helper), hier nur für eingerücktes Schreiben
 from thermik_calculator import calculate_dewpoint, calculate_thermal_profile
 
+# Stündliche Eingangsgrössen der Thermik-Berechnung. Einzige Quelle der Spaltennamen:
+# die Spalten werden einmal pro Region extrahiert und im Stundenloop in dieser Reihenfolge entpackt.
+THERMAL_INPUT_PARAMS = (
+    "temperature_2m",
+    "relative_humidity_2m",
+    "dewpoint_2m",
+    "boundary_layer_height",
+    "sunshine_duration",
+    "cape",
+    "surface_sensible_heat_flux",
+    "surface_latent_heat_flux",
+    "shortwave_radiation",
+    "direct_radiation",
+    "diffuse_radiation",
+    "soil_moisture_0_to_1cm",
+    "soil_temperature_0cm",
+    "updraft",
+    "et0_fao_evapotranspiration",
+    "vapour_pressure_deficit",
+    "lifted_index",
+    "convective_inhibition",
+)
+
+# Höhenprofil-Keys pro Druckniveau: (Level, Geopotential-Key, Temperatur-Key), einmal beim Import
+PROFILE_LEVEL_KEYS = tuple(
+    (level, f"geopotential_height_{level}hPa", f"temperature_{level}hPa")
+    for level in config.PRESSURE_LEVELS
+)
+
+# Alle hourly-Spalten, die _calculate_region liest (nur diese gehen an Worker-Prozesse)
+REGION_CALC_KEYS = ("time",) + THERMAL_INPUT_PARAMS + tuple(
+    key for _, h_key, t_key in PROFILE_LEVEL_KEYS for key in (h_key, t_key)
+)
+
+
+def _calculation_input(data):
+    """Reduziert eine Open-Meteo-Antwort auf die Spalten aus REGION_CALC_KEYS (kleinere Pickles)."""
+    hourly = data.get("hourly", {})
+    return {"hourly": {key: hourly[key] for key in REGION_CALC_KEYS if key in hourly}}
+
+
+def _calculate_region(region, data, flight_hours_start, flight_hours_end):
+    """
+    Stündliche Thermik-Berechnung und Tagesaggregation für eine Region.
+
+    Modul-Funktion (picklebar) für den ProcessPool; die Flugstunden werden explizit übergeben,
+    damit zur Laufzeit geänderte Config-Werte auch in Worker-Prozessen gelten.
+    Gibt (region_id, Ergebnis-Dict) zurück.
+    """
+    rid = region['id']
+    name = region['name']
+    lat = region['lat']
+    lon = region['lon']
+    # Regionsspezifische Referenzhöhe für den Paketaufstieg
+    elevation_ref = region.get('elevation_ref', 800)
+
+    hourly = data.get("hourly", {})
+    times = hourly.get("time", [])
+
+    days_data = defaultdict(list)
+    region_warnings = []
+
+    n = len(times)
+    input_rows = zip(*(column(hourly, param, n) for param in THERMAL_INPUT_PARAMS))
+    # Höhenprofil-Spalten einmal pro Region extrahieren (gleich lang wie times, fehlende Level = None)
+    profile_columns = [
+        (level, column(hourly, h_key, n), column(hourly, t_key, n))
+        for level, h_key, t_key in PROFILE_LEVEL_KEYS
+        if h_key in hourly and t_key in hourly
+    ]
+
+    for i, (time_str, row) in enumerate(zip(times, input_rows)):
+        # Open-Meteo liefert "YYYY-MM-DDTHH:MM" in config.TIMEZONE: Datum/Stunde per Slicing
+        date_str = time_str[:10]
+        hour = int(time_str[11:13])
+        if hour < flight_hours_start or hour >= flight_hours_end:
+            continue
+
+        # --- Basis-Wetterdaten und Flux-Parameter (Reihenfolge wie THERMAL_INPUT_PARAMS) ---
+        (surf_temp, rh, surf_dew, blh, sun, cape,
+         shf, lhf, swr, dir_rad, diff_rad, sm, st,
+         upd, et0_val, vpd_val, li_val, cin_val) = row
+
+        if surf_temp is None:
+            continue
+
+        # Taupunkt berechnen (falls nicht direkt verfügbar)
+        if surf_dew is None and rh is not None:
+            surf_dew = calculate_dewpoint(surf_temp, rh)
+
+        # --- Höhenprofil extrahieren ---
+        p_levels = []
+        for level, h_col, t_col in profile_columns:
+            h_val = h_col[i]
+            t_val = t_col[i]
+            if h_val is not None and t_val is not None:
+                p_levels.append({
+                    'pressure': level,
+                    'height': h_val,
+                    'temp': t_val
+                })
+
+        # --- Thermik-Berechnung mit neuer Physik ---
+        therm = calculate_thermal_profile(
+            surface_temp=surf_temp,
+            surface_dewpoint=surf_dew,
+            elevation_m=elevation_ref,
+            pressure_levels_data=p_levels,
+            boundary_layer_height_agl=blh,
+            sunshine_duration_s=sun,
+            surface_sensible_heat_flux=shf,
+            surface_latent_heat_flux=lhf,
+            shortwave_radiation=swr,
+            direct_radiation=dir_rad,
+            diffuse_radiation=diff_rad,
+            soil_moisture=sm,
+            soil_temperature=st,
+            updraft=upd,
+            et0=et0_val,
+            vpd=vpd_val,
+            lifted_index=li_val,
+            convective_inhibition=cin_val,
+        )
+
+        if "error" in therm:
+            therm = {
+                "climb_rate": 0, "rating": 0,
+                "max_height": 0, "lcl": 0,
+                "diagnostics": {}, "data_warnings": []
+            }
 
-def fetch_and_calculate_regions():
+        # Warnungen sammeln (pro Region aggregiert)
+        for w in therm.get("data_warnings", []):
+            if w not in region_warnings:
+                region_warnings.append(w)
+
+        # Diagnostics extrahieren
+        diag = therm.get("diagnostics", {})
+
+        days_data[date_str].append({
+            "hour": hour,
+            "climb": therm.get("climb_rate", 0),
+            "rating": therm.get("rating", 0),
+            "max_height": therm.get("max_height", 0),
+            "lcl": therm.get("lcl", 0),
+            "cape": cape or 0,
+            "w_star_parcel": diag.get("w_star_parcel", 0),
+            "w_star_deardorff": diag.get("w_star_deardorff", 0),
+            "limiting_factor": diag.get("limiting_factor", ""),
+            "sensible_heat_flux": diag.get("sensible_heat_flux", 0),
+            "bowen_ratio": diag.get("bowen_ratio"),
+        })
+
+    # --- Tageswerte aggregieren ---
+    region_daily = {}
+    for d, hourly_records in days_data.items():
+        if not hourly_records:
+            continue
+        # Ein Durchlauf über die Stunden statt je einem pro Kennzahl
+        max_climb = max_height = max_cape = float("-inf")
+        ratings = []
+        lcl_sum = 0
+        lcl_count = 0
+        for r in hourly_records:
+            if r["climb"] > max_climb:
+                max_climb = r["climb"]
+            if r["max_height"] > max_height:
+                max_height = r["max_height"]
+            if r["cape"] > max_cape:
+                max_cape = r["cape"]
+            ratings.append(r["rating"])
+            lcl = r["lcl"]
+            if lcl and lcl > 0:
+                lcl_sum += lcl
+                lcl_count += 1
+        top3 = heapq.nlargest(3, ratings)
+        top3_rating = sum(top3) / len(top3)
+        avg_lcl = lcl_sum / lcl_count if lcl_count else 0
+
+        region_daily[d] = {
+            "climb_rate": round(max_climb, 1),
+            "rating": round(top3_rating),
+            "max_height": round(max_height),
+            "lcl": round(avg_lcl),
+            "cape": round(max_cape),
+            "hourly": hourly_records,
+        }
+
+    entry = {
+        "id": rid,
+        "name": name,
+        "lat": lat,
+        "lon": lon,
+        "elevation_ref": elevation_ref,
+        "daily": region_daily,
+        "data_warnings": region_warnings,
+    }
+    print(f"  -> {name} (elev={elevation_ref}m) berechnet.")
+    return rid, entry
+
+
+def fetch_and_calculate_regions(pretty=False, processes=False):
     """
     Holt die Wetterdaten für alle 24 Regionen und berechnet das Thermik-Güte-Rating.
 
@@ -15,7 +220,10 @@ def fetch_and_calculate_regions():
     1. API-Anfrage an Open-Meteo für alle Regionen gleichzeitig (Batch)
     2. Pro Region: Stündliche Thermik-Berechnung mit regionsspezifischer elevation_ref
     3. Aggregation zu Tageswerten (max climb, top3 rating, etc.)
-    4. Speicherung als JSON (regions_forecast.json)
+    4. Speicherung als JSON (regions_forecast.json, kompakt; pretty=True für eingerückte Debug-Ausgabe)
+
+    processes=True verteilt Schritt 2 auf einen ProcessPool (nur CLI, --processes). Für die
+    aktuellen Regionen ist der serielle Loop schneller, da der Prozessstart die Rechenzeit übersteigt.
 
     Nutzt icon_seamless als Modell, das surface_sensible_heat_flux und
     surface_latent_heat_flux liefern kann. Zusätzlich shortwave_radiation
@@ -26,9 +234,6 @@ def fetch_and_calculate_regions():
 
     print(f"INFO: Hole Regionen-Daten für {days} Tage ({len(config.REGIONS)} Regionen)...")
 
-    lats = [str(r['lat']) for r in config.REGIONS]
-    lons = [str(r['lon']) for r in config.REGIONS]
-
     pl_params = ",".join(config.PRESSURE_LEVEL_PARAMS)
 
     # icon_seamless unterstuetzt surface_sensible_heat_flux / surface_latent_heat_flux nicht
@@ -42,177 +247,53 @@ def fetch_and_calculate_regions():
 
     hourly_params = ",".join(supported_hourly)
 
-    params = {
-        "latitude": ",".join(lats),
-        "longitude": ",".join(lons),
-        "models": "icon_seamless",
-        "hourly": hourly_params + "," + pl_params,
-        "forecast_days": days,
-        "timezone": config.TIMEZONE
-    }
-
-    try:
-        resp = requests.get(config.API_URL, params=params, timeout=30)
+    def fetch_chunk(regions):
+        """Eine Open-Meteo Abfrage für mehrere Regionen (komma-separierte Koordinaten)."""
+        params = {
+            "latitude": ",".join(str(r['lat']) for r in regions),
+            "longitude": ",".join(str(r['lon']) for r in regions),
+            "models": "icon_seamless",
+            "hourly": hourly_params + "," + pl_params,
+            "forecast_days": days,
+            "timezone": config.TIMEZONE
+        }
+        resp = SESSION.get(config.API_URL, params=params, timeout=30)
         resp.raise_for_status()
-        data_array = resp.json()
-
+        data = resp.json()
         # Falls nur eine Region abgefragt wurde, kommt ein Dict zurück, sonst eine Liste
-        if isinstance(data_array, dict):
-            data_array = [data_array]
-
-        for region_idx, region in enumerate(config.REGIONS):
-            rid = region['id']
-            name = region['name']
-            lat = region['lat']
-            lon = region['lon']
-            # Regionsspezifische Referenzhöhe für den Paketaufstieg
-            elevation_ref = region.get('elevation_ref', 800)
-
-            data = data_array[region_idx]
-            hourly = data.get("hourly", {})
-            times = hourly.get("time", [])
-
-            days_data = {}
-            region_warnings = []
-
-            for i, time_str in enumerate(times):
-                dt = datetime.fromisoformat(time_str)
-                date_str = dt.strftime("%Y-%m-%d")
-
-                hour = dt.hour
-                if hour < config.FLIGHT_HOURS_START or hour >= config.FLIGHT_HOURS_END:
-                    continue
-
-                if date_str not in days_data:
-                    days_data[date_str] = []
-
-                # --- Basis-Wetterdaten extrahieren ---
-                surf_temp = _safe_get(hourly, "temperature_2m", i)
-                rh = _safe_get(hourly, "relative_humidity_2m", i)
-                blh = _safe_get(hourly, "boundary_layer_height", i)
-                sun = _safe_get(hourly, "sunshine_duration", i)
-                cape = _safe_get(hourly, "cape", i)
-
-                if surf_temp is None:
-                    continue
-
-                # Taupunkt berechnen (falls nicht direkt verfügbar)
-                surf_dew = _safe_get(hourly, "dewpoint_2m", i)
-                if surf_dew is None and rh is not None:
-                    surf_dew = calculate_dewpoint(surf_temp, rh)
-
-                # --- Neue Flux-Parameter extrahieren ---
-                shf = _safe_get(hourly, "surface_sensible_heat_flux", i)
-                lhf = _safe_get(hourly, "surface_latent_heat_flux", i)
-                swr = _safe_get(hourly, "shortwave_radiation", i)
-                dir_rad = _safe_get(hourly, "direct_radiation", i)
-                diff_rad = _safe_get(hourly, "diffuse_radiation", i)
-                sm = _safe_get(hourly, "soil_moisture_0_to_1cm", i)
-                st = _safe_get(hourly, "soil_temperature_0cm", i)
-                upd = _safe_get(hourly, "updraft", i)
-                et0_val = _safe_get(hourly, "et0_fao_evapotranspiration", i)
-                vpd_val = _safe_get(hourly, "vapour_pressure_deficit", i)
-                li_val = _safe_get(hourly, "lifted_index", i)
-                cin_val = _safe_get(hourly, "convective_inhibition", i)
-
-                # --- Höhenprofil extrahieren ---
-                p_levels = []
-                for level in config.PRESSURE_LEVELS:
-                    h_key = f"geopotential_height_{level}hPa"
-                    t_key = f"temperature_{level}hPa"
-                    if h_key in hourly and t_key in hourly:
-                        h_val = _safe_get(hourly, h_key, i)
-                        t_val = _safe_get(hourly, t_key, i)
-                        if h_val is not None and t_val is not None:
-                            p_levels.append({
-                                'pressure': level,
-                                'height': h_val,
-                                'temp': t_val
-                            })
-
-                # --- Thermik-Berechnung mit neuer Physik ---
-                therm = calculate_thermal_profile(
-                    surface_temp=surf_temp,
-                    surface_dewpoint=surf_dew,
-                    elevation_m=elevation_ref,
-                    pressure_levels_data=p_levels,
-                    boundary_layer_height_agl=blh,
-                    sunshine_duration_s=sun,
-                    surface_sensible_heat_flux=shf,
-                    surface_latent_heat_flux=lhf,
-                    shortwave_radiation=swr,
-                    direct_radiation=dir_rad,
-                    diffuse_radiation=diff_rad,
-                    soil_moisture=sm,
-                    soil_temperature=st,
-                    updraft=upd,
-                    et0=et0_val,
-                    vpd=vpd_val,
-                    lifted_index=li_val,
-                    convective_inhibition=cin_val,
-                )
-
-                if "error" in therm:
-                    therm = {
-                        "climb_rate": 0, "rating": 0,
-                        "max_height": 0, "lcl": 0,
-                        "diagnostics": {}, "data_warnings": []
-                    }
-
-                # Warnungen sammeln (pro Region aggregiert)
-                for w in therm.get("data_warnings", []):
-                    if w not in region_warnings:
-                        region_warnings.append(w)
-
-                # Diagnostics extrahieren
-                diag = therm.get("diagnostics", {})
-
-                days_data[date_str].append({
-                    "hour": hour,
-                    "climb": therm.get("climb_rate", 0),
-                    "rating": therm.get("rating", 0),
-                    "max_height": therm.get("max_height", 0),
-                    "lcl": therm.get("lcl", 0),
-                    "cape": cape or 0,
-                    "w_star_parcel": diag.get("w_star_parcel", 0),
-                    "w_star_deardorff": diag.get("w_star_deardorff", 0),
-                    "limiting_factor": diag.get("limiting_factor", ""),
-                    "sensible_heat_flux": diag.get("sensible_heat_flux", 0),
-                    "bowen_ratio": diag.get("bowen_ratio"),
-                })
+        return [data] if isinstance(data, dict) else data
 
-            # --- Tageswerte aggregieren ---
-            region_daily = {}
-            for d, hourly_records in days_data.items():
-                if not hourly_records:
-                    continue
-                max_climb = max(r["climb"] for r in hourly_records)
-                max_height = max(r["max_height"] for r in hourly_records)
-                ratings = sorted([r["rating"] for r in hourly_records], reverse=True)
-                top3_rating = sum(ratings[:3]) / min(len(ratings), 3) if ratings else 0
-                max_cape = max(r["cape"] for r in hourly_records)
-                lcls = [r["lcl"] for r in hourly_records if r["lcl"] and r["lcl"] > 0]
-                avg_lcl = sum(lcls) / len(lcls) if lcls else 0
-
-                region_daily[d] = {
-                    "climb_rate": round(max_climb, 1),
-                    "rating": round(top3_rating),
-                    "max_height": round(max_height),
-                    "lcl": round(avg_lcl),
-                    "cape": round(max_cape),
-                    "hourly": hourly_records,
-                }
-
-            results[rid] = {
-                "id": rid,
-                "name": name,
-                "lat": lat,
-                "lon": lon,
-                "elevation_ref": elevation_ref,
-                "daily": region_daily,
-                "data_warnings": region_warnings,
-            }
-            print(f"  -> {name} (elev={elevation_ref}m) berechnet.")
+    try:
+        # Regionen in Blöcken zu REGIONS_BATCH_SIZE abfragen (ein Request pro Block, Blöcke parallel)
+        size = max(1, config.REGIONS_BATCH_SIZE)
+        chunks = [config.REGIONS[i:i + size] for i in range(0, len(config.REGIONS), size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(4, len(chunks)))) as executor:
+            data_array = [item for chunk_data in executor.map(fetch_chunk, chunks) for item in chunk_data]
+
+        # CPU-gebundene Thermik-Berechnung pro Region: nur auf Wunsch (processes=True) und ab
+        # REGIONS_PROCESS_POOL_MIN Regionen auf mehrere Prozesse verteilen, sonst seriell.
+        # Auf Vercel immer seriell (kein /dev/shm, Funktion läuft in einem einzelnen Prozess)
+        flight_hours = (
+            [config.FLIGHT_HOURS_START] * len(config.REGIONS),
+            [config.FLIGHT_HOURS_END] * len(config.REGIONS),
+        )
+        processed = None
+        if (processes and len(config.REGIONS) >= config.REGIONS_PROCESS_POOL_MIN
+                and os.environ.get('VERCEL') != '1'):
+            try:
+                # forkserver/spawn statt fork: Aufrufer kann der Webserver mit Threads sein
+                # (/api/trigger-update), ein fork würde von anderen Threads gehaltene Locks erben
+                start_methods = multiprocessing.get_all_start_methods()
+                mp_context = multiprocessing.get_context("forkserver" if "forkserver" in start_methods else "spawn")
+                with ProcessPoolExecutor(mp_context=mp_context) as executor:
+                    processed = list(executor.map(
+                        _calculate_region, config.REGIONS, map(_calculation_input, data_array), *flight_hours
+                    ))
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                print(f"[WARNUNG] ProcessPool nicht verfügbar ({e}), berechne Regionen seriell")
+        if processed is None:
+            processed = map(_calculate_region, config.REGIONS, data_array, *flight_hours)
+        results.update(processed)
 
         # --- Rohe Wetterdaten pro Region extrahieren und in InstantDB speichern ---
         region_raw = {}
@@ -222,24 +303,20 @@ def fetch_and_calculate_regions():
                 hourly = data_array[region_idx].get("hourly", {})
                 times = hourly.get("time", [])
 
-                hourly_data = {}
-                pressure_level_data = {}
+                n = len(times)
                 all_hourly_params = list(config.HOURLY_PARAMS) + ["relative_humidity_2m", "dewpoint_2m"]
-                for i, time_str in enumerate(times):
-                    h_entry = {}
-                    for param in all_hourly_params:
-                        val = _safe_get(hourly, param, i)
-                        if param == "cloud_base" and val is not None and val > 6000:
-                            val = None
-                        h_entry[param] = val
-                    hourly_data[time_str] = h_entry
-
-                    pl_entry = {}
-                    for level in config.PRESSURE_LEVELS:
-                        for var in ["temperature", "relative_humidity", "wind_speed", "wind_direction", "geopotential_height"]:
-                            key = f"{var}_{level}hPa"
-                            pl_entry[key] = _safe_get(hourly, key, i)
-                    pressure_level_data[time_str] = pl_entry
+                h_columns = {param: column(hourly, param, n) for param in all_hourly_params}
+                if "cloud_base" in h_columns:
+                    h_columns["cloud_base"] = [None if cb is not None and cb > 6000 else cb for cb in h_columns["cloud_base"]]
+
+                pl_columns = {}
+                for level in config.PRESSURE_LEVELS:
+                    for var in ["temperature", "relative_humidity", "wind_speed", "wind_direction", "geopotential_height"]:
+                        key = f"{var}_{level}hPa"
+                        pl_columns[key] = column(hourly, key, n)
+
+                hourly_data = pivot(times, h_columns)
+                pressure_level_data = pivot(times, pl_columns)
 
                 region_raw[rid] = {"hourly_data": hourly_data, "pressure_level_data": pressure_level_data}
 
@@ -256,20 +333,26 @@ def fetch_and_calculate_regions():
         import traceback
         traceback.print_exc()
 
+    # Standard: kompaktes JSON (Datei wird nur maschinell gelesen), eingerückt nur auf Wunsch
     output_path = config.get_data_dir() / "regions_forecast.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        output_path.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            if pretty:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            else:
+                json.dump(results, f, ensure_ascii=False, separators=(",", ":"))
 
     print(f"[OK] {len(results)} Regionen erfolgreich in {output_path} gespeichert.")
 
 
-def _safe_get(hourly: dict, key: str, index: int):
-    """Sicherer Zugriff auf stündliche API-Daten. Gibt None zurück bei fehlenden Daten."""
-    arr = hourly.get(key)
-    if arr is None or not isinstance(arr, list) or len(arr) <= index:
-        return None
-    return arr[index]
-
-
 if __name__ == "__main__":
-    fetch_and_calculate_regions()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Regionen-Thermikprognose berechnen")
+    parser.add_argument("--pretty", action="store_true", help="regions_forecast.json eingerückt schreiben (Debugging)")
+    parser.add_argument("--processes", action="store_true",
+                        help="Thermik-Berechnung auf mehrere Prozesse verteilen (lohnt erst bei vielen Regionen)")
+    args = parser.parse_args()
+    fetch_and_calculate_regions(pretty=args.pretty, processes=args.processes)
@@ -4,128 +4,270 @@
 import requests
 import json
 import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import config
+from json_helper import json_dumps, json_loads
 
+# Gemeinsame HTTP-Session: TCP/TLS-Verbindungen zu Open-Meteo werden wiederverwendet.
+# Transiente Fehler (429/5xx) werden mit exponentiellem Backoff wiederholt (Retry-After wird respektiert),
+# nicht wiederholbare 4xx-Fehler kommen sofort via raise_for_status() zurück.
+_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=_RETRY))
 
-def get_temperature_forecast_for_location(location_name, latitude, longitude):
-    """Ruft stündliche Wettervorhersage ab (Hybrid-Modell: ICON-CH1 + Seamless Fallback)"""
+# Vorab zusammengesetzte Variablenlisten (statisch, werden pro Abfrage wiederverwendet).
+# FORECAST_DAYS/TIMEZONE bleiben dynamisch, da sie zur Laufzeit über das Web-UI änderbar sind.
+HOURLY_JOINED = ",".join(config.HOURLY_PARAMS) + "," + ",".join(config.PRESSURE_LEVEL_PARAMS)
+GFS_JOINED = ",".join(config.GFS_SUPPLEMENTARY_PARAMS)
 
-    # Pressure-Level-Parameter für Höhenwind
-    pl_params = ",".join(config.PRESSURE_LEVEL_PARAMS)
+# ICON-Modelle, die in einem gemeinsamen Request abgefragt werden (CH1 hat Vorrang)
+HYBRID_MODELS = ("meteoswiss_icon_ch1", "icon_seamless")
 
-    # 1. Haupt-Request (ICON-CH1 für hohe Präzision & Cloud Base)
-    params_ch1 = {
+# In-Memory Antwort-Cache: (lat, lon, Modell, Variablen, Horizont, Zeitzone) -> (Zeitpunkt, hourly)
+_RESPONSE_CACHE = {}
+
+
+def _get_capped(params, timeout):
+    """Lädt eine Open-Meteo Antwort gestreamt und bricht ab, wenn sie API_MAX_RESPONSE_BYTES übersteigt."""
+    max_bytes = config.API_MAX_RESPONSE_BYTES
+    with SESSION.get(config.API_URL, params=params, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        declared = int(resp.headers.get("content-length") or 0)
+        if declared > max_bytes:
+            raise ValueError(f"Antwort zu gross ({declared} Bytes, Limit {max_bytes})")
+
+        body = bytearray()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                raise ValueError(f"Antwort zu gross (> {max_bytes} Bytes)")
+    return body
+
+
+def _cache_key(params):
+    """Erzeugt den Cache-Schlüssel einer Open-Meteo Abfrage (Koordinaten gerundet)."""
+    return (
+        round(float(params["latitude"]), 4),
+        round(float(params["longitude"]), 4),
+        params.get("models"),
+        params.get("hourly"),
+        params.get("forecast_days"),
+        params.get("timezone"),
+    )
+
+
+def _disk_cache_path(key):
+    """Pfad des persistenten Cache-Eintrags einer Abfrage (SHA-256 über den Cache-Schlüssel)."""
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    return config.get_data_dir() / config.API_CACHE_DIRNAME / f"{digest}.json"
+
+
+def _read_disk_cache(key):
+    """Liest (Zeitpunkt, hourly) aus dem persistenten Cache, None falls nicht vorhanden/defekt."""
+    try:
+        entry = json_loads(_disk_cache_path(key).read_bytes())
+        return entry["ts"], entry["hourly"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_disk_cache(key, ts, hourly):
+    """Schreibt einen Eintrag in den persistenten Cache (atomar ersetzt, Fehler sind nicht fatal)."""
+    path = _disk_cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"ts": ts, "hourly": hourly}
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(json_dumps(entry))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARNUNG] Open-Meteo Cache konnte nicht geschrieben werden: {e}")
+
+
+def _fetch_hourly(params, timeout):
+    """
+    Führt eine Open-Meteo Abfrage aus und gibt den 'hourly'-Block zurück.
+
+    Reihenfolge: In-Memory Cache -> persistenter Cache (beide API_CACHE_DURATION) -> API.
+    Schlägt die API fehl, wird ein höchstens API_CACHE_STALE_IF_ERROR alter Eintrag verwendet.
+    """
+    key = _cache_key(params)
+    now = time.time()
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is None:
+        cached = _read_disk_cache(key)
+        if cached is not None:
+            _RESPONSE_CACHE[key] = cached
+    if cached and now - cached[0] < config.API_CACHE_DURATION:
+        print(f"[INFO] Verwende gecachte Open-Meteo Daten ({params.get('models')})")
+        return cached[1]
+
+    try:
+        hourly = json_loads(_get_capped(params, timeout)).get("hourly", {})
+    except Exception as e:
+        if cached and now - cached[0] < config.API_CACHE_STALE_IF_ERROR:
+            age_min = int((now - cached[0]) / 60)
+            print(f"[WARNUNG] Open-Meteo Abfrage fehlgeschlagen ({e}), verwende {age_min} Min alte Daten ({params.get('models')})")
+            return cached[1]
+        raise
+
+    _RESPONSE_CACHE[key] = (now, hourly)
+    _write_disk_cache(key, now, hourly)
+    return hourly
+
+
+def _split_models(hourly, models):
+    """Teilt eine Multi-Modell-Antwort (Keys mit Modell-Suffix) in einen hourly-Block pro Modell."""
+    times = hourly.get("time", [])
+    split = {model: {"time": times} for model in models}
+    for key, values in hourly.items():
+        for model in models:
+            suffix = "_" + model
+            if key.endswith(suffix):
+                split[model][key[:-len(suffix)]] = values
+                break
+    return split
+
+
+def column(hourly, param, n):
+    """Liefert eine Spalte als neue Liste mit genau n Werten (fehlende Werte = None)."""
+    col = hourly.get(param) or []
+    if len(col) >= n:
+        return list(col[:n])
+    return list(col) + [None] * (n - len(col))
+
+
+def pivot(times, columns):
+    """Wandelt spaltenweise Daten in {Zeitstempel: {Parameter: Wert}} um."""
+    keys = tuple(columns)
+    return {
+        time_str: dict(zip(keys, values))
+        for time_str, *values in zip(times, *columns.values())
+    }
+
+
+def get_temperature_forecast_for_location(location_name, latitude, longitude, columns=None):
+    """Ruft stündliche Wettervorhersage ab (Hybrid-Modell: ICON-CH1 + Seamless Fallback)
+
+    Args:
+        columns: Optionale Auswahl an Oberflächen-Parametern. Nur diese werden abgefragt
+                 und in hourly_data übernommen (Standard: alle config.HOURLY_PARAMS).
+    """
+    wanted = list(columns) if columns else config.HOURLY_PARAMS
+    if columns:
+        hourly_joined = ",".join(wanted) + "," + ",".join(config.PRESSURE_LEVEL_PARAMS)
+        gfs_params = [p for p in config.GFS_SUPPLEMENTARY_PARAMS if p in wanted]
+        gfs_joined = ",".join(gfs_params)
+    else:
+        hourly_joined = HOURLY_JOINED
+        gfs_params = config.GFS_SUPPLEMENTARY_PARAMS
+        gfs_joined = GFS_JOINED
+
+    # 1. Kombinierter Request: ICON-CH1 (hohe Präzision & Cloud Base) + Seamless (3. Tag / Lücken)
+    params_hybrid = {
         "latitude": latitude,
         "longitude": longitude,
-        "models": "meteoswiss_icon_ch1",
-        "hourly": ",".join(config.HOURLY_PARAMS) + "," + pl_params,
+        "models": ",".join(HYBRID_MODELS),
+        "hourly": hourly_joined,
         "forecast_days": config.FORECAST_DAYS,
         "timezone": config.TIMEZONE
     }
 
-    # 2. Fallback-Request (Seamless für 3. Tag / Lücken)
-    params_seamless = {
+    # 2. GFS-Supplementary (BLH, LI, CIN – bei icon_seamless oft null), nur die gewünschten Parameter
+    params_gfs = {
         "latitude": latitude,
         "longitude": longitude,
-        "models": "icon_seamless",
-        "hourly": ",".join(config.HOURLY_PARAMS) + "," + pl_params,
+        "hourly": gfs_joined,
+        "models": "gfs_seamless",
         "forecast_days": config.FORECAST_DAYS,
-        "timezone": config.TIMEZONE
+        "timezone": config.TIMEZONE,
     }
 
     try:
-        # Abrufen beider Modelle (CH1 ist optional, Seamless ist Pflicht)
-        data_ch1 = None
-        try:
-            print(f"[INFO] Rufe ICON-CH1 Daten ab fuer {location_name}...")
-            resp_ch1 = requests.get(config.API_URL, params=params_ch1, timeout=config.API_TIMEOUT)
-            resp_ch1.raise_for_status()
-            data_ch1 = resp_ch1.json()
-        except requests.exceptions.RequestException as e:
-            print(f"[WARNUNG] ICON-CH1 fehlgeschlagen (weiter mit Seamless): {e}")
-
-        print(f"[INFO] Rufe Seamless Fallback Daten ab fuer {location_name}...")
-        resp_sl = requests.get(config.API_URL, params=params_seamless, timeout=config.API_TIMEOUT)
-        resp_sl.raise_for_status()
-        data_sl = resp_sl.json()
-
-        hourly_ch1 = data_ch1.get("hourly", {}) if data_ch1 else {}
-        hourly_sl = data_sl.get("hourly", {})
+        # ICON-Modelle (ein Request) und GFS parallel abrufen
+        print(f"[INFO] Rufe ICON-CH1/Seamless und GFS Daten parallel ab fuer {location_name}...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_hybrid = executor.submit(_fetch_hourly, params_hybrid, config.API_TIMEOUT)
+            # Ohne gewünschte GFS-Parameter entfällt der GFS-Request ganz
+            future_gfs = executor.submit(_fetch_hourly, params_gfs, 10) if gfs_params else None
+
+            try:
+                by_model = _split_models(future_hybrid.result(), HYBRID_MODELS)
+                hourly_ch1 = by_model["meteoswiss_icon_ch1"]
+                hourly_sl = by_model["icon_seamless"]
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Fallback: Modelle einzeln abfragen (CH1 optional, Seamless Pflicht).
+                # ValueError: Antwort grösser als API_MAX_RESPONSE_BYTES (trifft v.a. den kombinierten Request)
+                print(f"[WARNUNG] Kombinierter ICON-Request fehlgeschlagen, frage Modelle einzeln ab: {e}")
+                future_ch1 = executor.submit(_fetch_hourly, {**params_hybrid, "models": "meteoswiss_icon_ch1"}, config.API_TIMEOUT)
+                future_sl = executor.submit(_fetch_hourly, {**params_hybrid, "models": "icon_seamless"}, config.API_TIMEOUT)
+
+                hourly_ch1 = {}
+                try:
+                    hourly_ch1 = future_ch1.result()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"[WARNUNG] ICON-CH1 fehlgeschlagen (weiter mit Seamless): {e}")
+
+                hourly_sl = future_sl.result()
 
         times_sl = hourly_sl.get("time", [])
         if not times_sl:
             print(f"[WARNUNG] Keine Seamless Daten verfügbar für {location_name}")
             return None, None
 
-        # Merging Logik: Initialisiere mit Seamless (für alle 3 Tage)
-        hourly_data = {}
-        pressure_level_data = {}
-        for i, time_str in enumerate(times_sl):
-            # Surface-Parameter aus Seamless
-            entry = {}
-            for param in config.HOURLY_PARAMS:
-                val = hourly_sl.get(param, [None])[i] if i < len(hourly_sl.get(param, [])) else None
-                entry[param] = val
-            hourly_data[time_str] = entry
-
-            # Pressure-Level-Parameter aus Seamless
-            pl_entry = {}
-            for param in config.PRESSURE_LEVEL_PARAMS:
-                val = hourly_sl.get(param, [None])[i] if i < len(hourly_sl.get(param, [])) else None
-                pl_entry[param] = val
-            pressure_level_data[time_str] = pl_entry
-
-        # Ueberschreibe/Ergaenze mit ICON-CH1 (wo verfuegbar und nicht null)
+        # Merging Logik spaltenweise: Seamless als Basis (für alle 3 Tage),
+        # ICON-CH1 überschreibt wo verfügbar, GFS füllt verbleibende Lücken.
+        n = len(times_sl)
+        index_of = {ts: i for i, ts in enumerate(times_sl)}
         times_ch1 = hourly_ch1.get("time", []) if hourly_ch1 else []
-        for i, time_str in enumerate(times_ch1):
-            if time_str not in hourly_data:
-                continue
-
-            for param in config.HOURLY_PARAMS:
-                val_ch1 = hourly_ch1.get(param, [None])[i] if i < len(hourly_ch1.get(param, [])) else None
-                if val_ch1 is not None:
-                    hourly_data[time_str][param] = val_ch1
-
-            # Pressure-Level-Parameter aus ICON-CH1
-            if time_str in pressure_level_data:
-                for param in config.PRESSURE_LEVEL_PARAMS:
-                    val_ch1 = hourly_ch1.get(param, [None])[i] if i < len(hourly_ch1.get(param, [])) else None
-                    if val_ch1 is not None:
-                        pressure_level_data[time_str][param] = val_ch1
+        ch1_positions = [(index_of[ts], j) for j, ts in enumerate(times_ch1) if ts in index_of]
+
+        def merged_column(param):
+            col = column(hourly_sl, param, n)
+            src = hourly_ch1.get(param) if hourly_ch1 else None
+            if src:
+                for i, j in ch1_positions:
+                    if j < len(src) and src[j] is not None:
+                        col[i] = src[j]
+            return col
+
+        h_columns = {param: merged_column(param) for param in wanted}
+        pl_columns = {param: merged_column(param) for param in config.PRESSURE_LEVEL_PARAMS}
 
         # Bereinige Sentinel-Werte: cloud_base > 6000m bedeutet "wolkenfrei" (Modell-Obergrenze)
-        for time_str in hourly_data:
-            cb = hourly_data[time_str].get('cloud_base')
-            if cb is not None and cb > 6000:
-                hourly_data[time_str]['cloud_base'] = None
-
-        # 3. GFS-Supplementary (BLH, LI, CIN – bei icon_seamless oft null)
-        try:
-            print(f"[INFO] Rufe GFS-Supplement ab fuer {location_name} (BLH, LI, CIN)...")
-            params_gfs = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "hourly": ",".join(config.GFS_SUPPLEMENTARY_PARAMS),
-                "models": "gfs_seamless",
-                "forecast_days": config.FORECAST_DAYS,
-                "timezone": config.TIMEZONE,
-            }
-            resp_gfs = requests.get(config.API_URL, params=params_gfs, timeout=10)
-            resp_gfs.raise_for_status()
-            hourly_gfs = resp_gfs.json().get("hourly", {})
-            gfs_times = hourly_gfs.get("time", [])
-            filled = 0
-            for i, ts in enumerate(gfs_times):
-                if ts in hourly_data:
-                    for p in config.GFS_SUPPLEMENTARY_PARAMS:
-                        if hourly_data[ts].get(p) is None:
-                            val = hourly_gfs.get(p, [None])[i] if i < len(hourly_gfs.get(p, [])) else None
-                            if val is not None:
-                                hourly_data[ts][p] = val
-                                filled += 1
-            print(f"[INFO] GFS-Supplement: {filled} Null-Werte aufgefuellt")
-        except Exception as e:
-            print(f"[WARNUNG] GFS-Supplement fehlgeschlagen (weiter ohne): {e}")
+        if 'cloud_base' in h_columns:
+            h_columns['cloud_base'] = [None if cb is not None and cb > 6000 else cb for cb in h_columns['cloud_base']]
+
+        # GFS-Supplement: Null-Werte auffüllen
+        if future_gfs is not None:
+            try:
+                hourly_gfs = future_gfs.result()
+                gfs_positions = [(index_of[ts], j) for j, ts in enumerate(hourly_gfs.get("time", [])) if ts in index_of]
+                filled = 0
+                for p in gfs_params:
+                    src = hourly_gfs.get(p) or []
+                    col = h_columns.setdefault(p, [None] * n)
+                    for i, j in gfs_positions:
+                        if col[i] is None and j < len(src) and src[j] is not None:
+                            col[i] = src[j]
+                            filled += 1
+                print(f"[INFO] GFS-Supplement: {filled} Null-Werte aufgefuellt")
+            except Exception as e:
+                print(f"[WARNUNG] GFS-Supplement fehlgeschlagen (weiter ohne): {e}")
+
+        # Einmalige Umwandlung in das zeilenweise Format {Zeitstempel: {Parameter: Wert}}
+        hourly_data = pivot(times_sl, h_columns)
+        pressure_level_data = pivot(times_sl, pl_columns)
 
         print(f"[INFO] Hybrid-Merge abgeschlossen: {len(hourly_data)} Zeitstempel für {location_name}")
         return hourly_data, pressure_level_data
@@ -189,7 +331,7 @@ def fetch_weather_for_location(save_to_file=True, output_path=None):
         
         # Speichere als Dictionary mit Standortname als Key
         all_weather_data = {location['name']: location_entry}
-        print(all_weather_data)
+        print(f"[INFO] {len(hourly_data)} Stunden, {len(pressure_level_data)} Höhenprofile für {location['name']}")
         
         # Speichere in Datei falls gewünscht
         if save_to_file:
@@ -199,8 +341,9 @@ def fetch_weather_for_location(save_to_file=True, output_path=None):
                 json_filename = output_path
                 os.makedirs(os.path.dirname(json_filename), exist_ok=True)
             
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(all_weather_data, f, indent=2, ensure_ascii=False)
+            # Kompaktes JSON (ohne Einrückung): deutlich kleiner und schneller wieder eingelesen
+            with open(json_filename, 'wb') as f:
+                f.write(json_dumps(all_weather_data))
             
             print(f"\n[INFO] Wetterdaten gespeichert in: {json_filename}")
         
@@ -11,11 +11,11 @@ Berechnet Föhn-Warnstufen basierend auf:
 Verwendet MeteoSwiss ICON für die Schweiz (hochauflösend).
 """
 
-import requests
 from datetime import datetime
 from typing import Optional
 
 import config
+from fetch_weather import SESSION
 
 # ============================================================================
 # FÖHN-REFERENZSTATIONEN
@@ -79,7 +79,7 @@ def fetch_foehn_data(forecast_days: int = 2) -> Optional[dict]:
     }
 
     try:
-        resp = requests.get(config.API_URL, params=params, timeout=config.API_TIMEOUT)
+        resp = SESSION.get(config.API_URL, params=params, timeout=config.API_TIMEOUT)
         resp.raise_for_status()
         data = resp.json()
 
@@ -327,8 +327,10 @@ def get_foehn_for_dashboard(forecast_days: int = 2) -> dict:
             worst_level = ev["level"]
 
     # Repräsentative Bewertung: erste Flugstunde heute oder schlimmste
-    first_today = next((r for r in results_by_hour if r["time"].startswith(
-        dt.now().strftime("%Y-%m-%d"))), None)
+    # Datum einmal bestimmen (nicht pro Stunde im Generator formatieren)
+    now = dt.now()
+    today = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+    first_today = next((r for r in results_by_hour if r["time"].startswith(today)), None)
     first_result = first_today or (results_by_hour[0] if results_by_hour else None)
 
     if first_result:
@@ -10,6 +10,8 @@ import os
 import uuid
 import requests
 
+from json_helper import json_dumps, json_loads
+
 logger = logging.getLogger(__name__)
 
 # InstantDB Konfiguration
@@ -53,7 +55,7 @@ def save_weather_data(weather_data: dict) -> bool:
         payload = {
             "steps": [
                 ["update", "weather_data", WEATHER_RECORD_ID, {
-                    "data": json.dumps(weather_data, ensure_ascii=False),
+                    "data": json_dumps(weather_data).decode("utf-8"),
                     "updated_at": __import__('datetime').datetime.utcnow().isoformat() + "Z"
                 }]
             ],
@@ -119,7 +121,7 @@ def load_weather_data() -> dict | None:
             logger.warning("InstantDB Datensatz hat keine 'data'-Feld")
             return None
         
-        weather_data = json.loads(data_str)
+        weather_data = json_loads(data_str)
         logger.info(f"Wetterdaten aus InstantDB geladen (updated: {record.get('updated_at', 'unbekannt')})")
         return weather_data
         
@@ -145,7 +147,7 @@ def save_evaluation_data(evaluation_data: dict) -> bool:
         payload = {
             "steps": [
                 ["update", "evaluation_data", EVALUATION_RECORD_ID, {
-                    "data": json.dumps(evaluation_data, ensure_ascii=False),
+                    "data": json_dumps(evaluation_data).decode("utf-8"),
                     "updated_at": __import__('datetime').datetime.utcnow().isoformat() + "Z"
                 }]
             ],
@@ -209,7 +211,7 @@ def load_evaluation_data() -> dict | None:
         if not data_str:
             return None
         
-        eval_data = json.loads(data_str)
+        eval_data = json_loads(data_str)
         logger.info(f"Evaluierungen aus InstantDB geladen (updated: {record.get('updated_at', 'unbekannt')})")
         return eval_data
         
@@ -246,7 +248,7 @@ def save_all_regions_weather(regions_dict: dict, batch_size: int = 5) -> bool:
                 record_id = _region_record_id(region_id)
                 steps.append([
                     "update", "regions_weather", record_id, {
-                        "data": json.dumps(data, ensure_ascii=False),
+                        "data": json_dumps(data).decode("utf-8"),
                         "region_id": region_id,
                         "updated_at": updated_at
                     }
@@ -443,7 +445,7 @@ def load_region_weather(region_id: str) -> dict | None:
                 data_str = record.get("data")
                 if not data_str:
                     return None
-                return json.loads(data_str)
+                return json_loads(data_str)
 
         logger.info(f"Keine Wetterdaten fuer Region '{region_id}' gefunden")
         return None
@@ -0,0 +1,25 @@
+"""
+JSON Helper - Gemeinsames Parsen/Serialisieren für alle Module.
+Verwendet orjson falls installiert (deutlich schneller), sonst stdlib json mit gleichem Ergebnis.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(raw):
+    """Parst JSON (str oder Bytes) mit orjson (falls installiert) oder stdlib json."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(obj):
+    """Serialisiert nach kompakten JSON-Bytes (UTF-8, ohne ASCII-Escapes, Nicht-String-Keys erlaubt)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -6,22 +6,18 @@ Die GESAMTE Flugbarkeits-Analyse wird vom LLM durchgeführt.
 """
 
 import os
+import copy
 import json
-import requests
 import logging
 import time
-from typing import Dict, List, Tuple
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
-
-from thermik_calculator import analyze_hour, calculate_thermal_profile, calculate_dewpoint
-
 from config import (
     LLM_SYSTEM_PROMPT,
     LLM_USER_PROMPT_TEMPLATE,
@@ -30,18 +26,255 @@ from config import (
     FLIGHT_HOURS_START,
     FLIGHT_HOURS_END,
     PRESSURE_LEVELS,
+    LLM_MAX_CONCURRENCY,
+    LLM_BATCH_DAYS,
+    LLM_STREAM,
+    PROMPT_MAX_HOURS,
+    PROMPT_INCLUDE_SUNSHINE,
+    LLM_BATCH_API_POLL_INTERVAL,
+    LLM_BATCH_API_MAX_WAIT,
+    LLM_CACHE_TTL,
+    LLM_CACHE_FILENAME,
+    LLM_EXACT_CACHE_DIRNAME,
+    LLM_EXACT_CACHE_MAX_ENTRIES,
+    NO_FLY_MAX_GUST,
+    NO_FLY_TOTAL_PRECIP,
+    get_data_dir,
     get_weather_json_path,
     get_evaluations_json_path
 )
 
-try:
-    from email_notifier import EmailNotifier
-except ImportError:
-    EmailNotifier = None
+# orjson ist optional (siehe json_helper); direkt genutzt nur für Optionen wie Einrückung/Key-Sortierung
+from json_helper import json_dumps, json_loads, orjson
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Vorberechnete Pressure-Level-Keys (einmal beim Import statt pro Stunde und Level)
+# Thermik-Profil: (Level, Geopotential-Key, Temperatur-Key)
+_THERMAL_PL_KEYS = tuple(
+    (level, f'geopotential_height_{level}hPa', f'temperature_{level}hPa')
+    for level in PRESSURE_LEVELS
+)
+# Höhenwind-Prompt: nur 3 kritische Level, um Tokens zu sparen (Boden/Inversion, mittlere Höhe, Scherungs-Höhe)
+# 850hPa (~1500m), 700hPa (~3000m), 500hPa (~5500m)
+_WIND_PROFILE_KEYS = tuple(
+    (level, f'geopotential_height_{level}hPa', f'wind_speed_{level}hPa',
+     f'wind_direction_{level}hPa', f'temperature_{level}hPa')
+    for level in (850, 700, 500)
+)
+
+# Schema der Sektor-Felder aus der LLM-Antwort: (Feld, Konverter, Default)
+_SECTOR_FIELDS = (
+    ('slot', str, ''),
+    ('safety', lambda v: str(v).upper(), 'SAFE'),
+    ('flyable', bool, False),
+    ('rating', int, 0),
+    ('wind_info', str, ''),
+    ('reason', str, 'Keine Begründung'),
+)
+# Pflichtfelder im details-Block (werden mit "Nicht verfügbar" ergänzt)
+_DETAIL_FIELDS = ('wind', 'thermik', 'risks')
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+
+# HTTP-Status der OpenAI API, bei denen ein Retry sinnlos ist (fehlerhafter Request, unbekanntes Modell)
+NON_RETRYABLE_STATUS = (400, 404, 422)
+
+# Modelle (Namensbestandteile), die response_format={"type": "json_object"} unterstützen
+JSON_MODE_MODELS = ("gpt-4-turbo", "gpt-4-turbo-preview", "gpt-4-0125-preview", "gpt-4o", "gpt-4o-mini", "gpt-4.1-mini", "gpt-4.1-nano", "gpt-3.5-turbo")
+
+
+def _split_timestamp(timestamp: str) -> Tuple[str, int]:
+    """Zerlegt einen ISO-Zeitstempel 'YYYY-MM-DDTHH:MM' per Slicing in (Datum, Stunde)."""
+    if timestamp[4:5] != '-' or timestamp[7:8] != '-' or timestamp[10:11] not in ('T', ' '):
+        raise ValueError(f"Ungültiger Zeitstempel: {timestamp}")
+    return timestamp[:10], int(timestamp[11:13])
+
+
+def _round_num(value, ndigits=None):
+    """Rundet Zahlen für Prompt und Cache-Schlüssel; nicht-numerische Werte wie 'N/A' bleiben unverändert."""
+    if isinstance(value, (int, float)):
+        return round(value, ndigits)
+    return value
+
+
+def _retry_after_seconds(response, default: float) -> float:
+    """Liest den Retry-After Header (Sekunden); bei fehlendem/ungültigem Wert gilt default."""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _read_sse_content(response) -> Tuple[str, Optional[str]]:
+    """
+    Setzt den Antwort-Text eines gestreamten Chat-Completion Requests zusammen.
+
+    Jede Zeile 'data: {...}' enthält ein Delta in choices[0].delta.content; 'data: [DONE]' beendet den Stream.
+    Gibt (Text, finish_reason) zurück; finish_reason steht im letzten Chunk.
+    """
+    parts = []
+    finish_reason = None
+    for line in response.iter_lines():
+        if not line or not line.startswith(b'data:'):
+            continue
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            break
+        chunk = json_loads(data)
+        choices = chunk.get('choices') or []
+        if choices:
+            content = (choices[0].get('delta') or {}).get('content')
+            if content:
+                parts.append(content)
+            finish_reason = choices[0].get('finish_reason') or finish_reason
+    return "".join(parts), finish_reason
+
+
+def _message_content(response_json: Dict) -> str:
+    """Liefert den Antwort-Text einer Chat-Completion; abgeschnittene Antworten (max_tokens erreicht) sind ein Fehler."""
+    choice = response_json['choices'][0]
+    if choice.get('finish_reason') == 'length':
+        raise ValueError("LLM-Antwort abgeschnitten (finish_reason=length): max_tokens zu klein für das JSON")
+    return choice['message']['content']
+
+
+# Gerundete Wetter-Features für den LLM-Cache-Schlüssel: (Feld, Nachkommastellen für round())
+_CACHE_FEATURES = (
+    ('temperature_2m', 0),
+    ('wind_speed_10m', 0),
+    ('wind_direction_10m', -1),
+    ('wind_gusts_10m', 0),
+    ('cloud_base', -2),
+    ('cloud_cover', -1),
+    ('cape', -1),
+    ('precipitation', 1),
+)
+# Gerundete Druckniveau-Werte (Thermik-Profil und Höhenwind im Prompt) für den Cache-Schlüssel
+_CACHE_PL_FEATURES = tuple(
+    (key, ndigits)
+    for level in PRESSURE_LEVELS
+    for key, ndigits in (
+        (f'geopotential_height_{level}hPa', -1),
+        (f'temperature_{level}hPa', 0),
+        (f'wind_speed_{level}hPa', 0),
+        (f'wind_direction_{level}hPa', -1),
+    )
+)
+_LLM_CACHE_LOCK = threading.Lock()
+# Gültige Einträge des JSONL-Caches {key: entry}; neu gelesen nur bei geänderter (mtime, size)
+_llm_cache_entries: Dict[str, Dict] = {}
+_llm_cache_stat = None
+
+
+def _llm_cache_path() -> Path:
+    return get_data_dir() / LLM_CACHE_FILENAME
+
+
+def _read_llm_cache() -> List[Dict]:
+    """Liest alle Einträge des LLM-Caches (JSONL); defekte Zeilen werden übersprungen."""
+    path = _llm_cache_path()
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json_loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def _load_llm_cache() -> Dict[str, Dict]:
+    """
+    Liefert die gültigen LLM-Cache-Einträge {key: entry} (nur unter _LLM_CACHE_LOCK aufrufen).
+
+    Die Datei wird nur gelesen, wenn sich (mtime, size) seit dem letzten Lesen/Schreiben geändert hat,
+    z.B. durch einen anderen Prozess. Dabei werden abgelaufene und überschriebene Einträge verworfen
+    und die Datei einmal kompaktiert; gespeichert wird sonst nur per Anhängen einer Zeile.
+    """
+    global _llm_cache_entries, _llm_cache_stat
+    path = _llm_cache_path()
+    try:
+        st = path.stat()
+    except OSError:
+        _llm_cache_entries, _llm_cache_stat = {}, None
+        return _llm_cache_entries
+    if (st.st_mtime_ns, st.st_size) == _llm_cache_stat:
+        return _llm_cache_entries
+
+    now = time.time()
+    lines = _read_llm_cache()
+    entries = {}
+    for entry in lines:
+        if 'key' in entry and now - entry.get('ts', 0) < LLM_CACHE_TTL:
+            entries[entry['key']] = entry  # spätere Zeilen überschreiben frühere
+    if len(entries) < len(lines):
+        try:
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, path)
+            st = path.stat()
+        except OSError as e:
+            logger.warning(f"LLM-Cache konnte nicht kompaktiert werden: {e}")
+
+    _llm_cache_entries, _llm_cache_stat = entries, (st.st_mtime_ns, st.st_size)
+    return entries
+
+
+def _read_exact_cache(path: Path):
+    """Liest einen exakten Cache-Eintrag (None falls nicht vorhanden/defekt)."""
+    try:
+        return json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_exact_cache(path: Path, result: Dict) -> None:
+    """Schreibt einen exakten Cache-Eintrag und entfernt die ältesten über LLM_EXACT_CACHE_MAX_ENTRIES."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(json_dumps(result))
+
+        entries = list(path.parent.glob('*.json'))
+        if len(entries) > LLM_EXACT_CACHE_MAX_ENTRIES:
+            entries.sort(key=lambda p: p.stat().st_mtime)
+            for old in entries[:len(entries) - LLM_EXACT_CACHE_MAX_ENTRIES]:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"LLM-Cache konnte nicht geschrieben werden: {e}")
+
+
+def _fingerprint(obj) -> str:
+    """Stabiler Hash eines JSON-serialisierbaren Objekts (Keys sortiert)."""
+    if orjson is not None:
+        raw = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    else:
+        raw = json.dumps(obj, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _load_weather_file(path_str: str, mtime_ns: int) -> Dict:
+    """Parst die Wetterdaten-Datei; Cache-Schlüssel enthält die mtime, neue Daten werden neu geladen."""
+    return json_loads(Path(path_str).read_bytes())
+
+
+# Konstante Rahmen/Trennlinien der Terminal-Ausgabe (einmal beim Import erstellt)
+_BOX_TOP = "╔" + "═" * 63 + "╗"
+_BOX_BOTTOM = "╚" + "═" * 63 + "╝"
+_SEP_LINE = "━" * 65
+
+# Zeilen-Template der Stundenwerte im Prompt (einmal definiert, pro Zeile nur .format)
+_HOUR_ROW_TMPL = (
+    "{ts}: Temp {t}°C | Wind {ws}km/h aus {wd}° (Böen {wg}km/h) | "
+    "Wolkenbasis {cb} | Bewölkung {cc}% | CAPE {cp} J/kg | Niederschlag {pp}mm{sun}{thermal}"
+)
+
 
 class Colors:
     GREEN = '\033[92m'
@@ -53,18 +286,58 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Terminal-Darstellung der Bedingungen: (Farbe, Icon, Label)
+_CONDITION_STYLES = {
+    'LEGENDARY': ('\033[95m', '🏆', 'LEGENDÄR'),  # Magenta/Purple
+    'GOOD': (Colors.GREEN, '✅', 'GUT'),
+    'FLYABLE': (Colors.CYAN, '🪂', 'FLIEGBAR'),
+    'CAUTION': (Colors.YELLOW, '⚠️', 'AUFPASSEN'),
+    'DANGEROUS': (Colors.RED, '🚫', 'GEFÄHRLICH'),
+}
+
+
 class LocationEvaluator:
     """Evaluiert Flugbarkeit des Uetliberg Startplatzes basierend auf Wetterdaten."""
     
     def __init__(self, weather_json_path: str = None, model: str = None):
+        # .env nur laden, falls der Aufrufer (CLI main, web.py) das nicht bereits getan hat
+        if os.environ.get('OPENAI_API_KEY') is None:
+            try:
+                from dotenv import load_dotenv
+                load_dotenv()
+            except ImportError:
+                pass
+
         self.weather_json_path = weather_json_path or str(get_weather_json_path())
         self.model = model or os.environ.get('OPENAI_MODEL', 'gpt-4.1-mini')
         self.api_key = os.environ.get('OPENAI_API_KEY')
+        # JSON-Mode einmalig bestimmen (Modell ändert sich pro Instanz nicht)
+        self._supports_json_mode = any(m in self.model for m in JSON_MODE_MODELS)
         
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY nicht gesetzt")
         
-        # Initialisiere E-Mail-Notifier (optional)
+        # Pro-Instanz Caches: Prompts je Tagesdaten-Hash, Föhn-Block (für alle Tage gleich)
+        self._prompt_cache = {}
+        self._foehn_info = None
+        self._foehn_lock = threading.Lock()
+        
+        # Persistente HTTP-Session: Keep-Alive, TLS-Verbindungen zu OpenAI werden über Tage/Retries wiederverwendet
+        # (requests wird erst hier importiert: reine Formatierungs-Nutzung bleibt schnell importierbar)
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._session = requests.Session()
+        self._session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+        # Pool-Grösse folgt der Parallelität der Tages-Analyse, damit kein Thread auf eine freie Verbindung wartet
+        pool_size = max(1, LLM_MAX_CONCURRENCY)
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0))
+        
+        # Initialisiere E-Mail-Notifier (optional, verzögerter Import)
+        try:
+            from email_notifier import EmailNotifier
+        except ImportError:
+            EmailNotifier = None
+
         if EmailNotifier:
             try:
                 self.email_notifier = EmailNotifier()
@@ -73,10 +346,28 @@ class LocationEvaluator:
                 self.email_notifier = None
         else:
             self.email_notifier = None
+
+    def close(self) -> None:
+        """Schliesst die HTTP-Session und gibt die Keep-Alive Verbindungen frei."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
-    def analyze(self) -> List[Dict]:
-        """Hauptmethode: Lädt Wetterdaten und erstellt Ticker für jeden Forecast-Tag."""
+    def analyze(self, use_batch_api: bool = False) -> List[Dict]:
+        """
+        Hauptmethode: Lädt Wetterdaten und erstellt Ticker für jeden Forecast-Tag.
+
+        Args:
+            use_batch_api: Tage über die OpenAI Batch API auswerten (günstiger, aber asynchron –
+                           kann bis zu 24h dauern; nur für CLI-Läufe gedacht)
+        """
         logger.info(f"Analysiere Uetliberg Startplatz für {FORECAST_DAYS} Tage")
+        # Ein Zeitstempel pro Analyse-Lauf für alle Tage
+        run_ts = datetime.now().isoformat()
         
         # Lade Wetterdaten für Uetliberg
         weather_data = self._load_weather_data()
@@ -84,61 +375,155 @@ class LocationEvaluator:
         pressure_level_data = weather_data.get('pressure_level_data', {})
 
         # Gruppiere nach Tagen und filtere Flugstunden
-        days_data = self._group_by_days(hourly_data, pressure_level_data)
+        days_data, days_pl_data = self._group_by_days(hourly_data, pressure_level_data)
         
-        # Sortiere Tage chronologisch und limitiere auf FORECAST_DAYS
-        sorted_dates = sorted(days_data.keys())[:FORECAST_DAYS]
+        # Tage sind bereits chronologisch sortiert (siehe _group_flight_hours), limitiere auf FORECAST_DAYS
+        sorted_dates = list(days_data)[:FORECAST_DAYS]
         
-        results = []
         for date in sorted_dates:
-            day_data = days_data[date]
-            logger.info(f"Analysiere Tag: {date} ({len(day_data)} Stunden)")
-            result = self.analyze_day(day_data, date)
-            results.append(result)
+            logger.info(f"Analysiere Tag: {date} ({len(days_data[date])} Stunden)")
+
+        # Offensichtlich unfliegbare Tage (Sturm, Dauerregen) ohne LLM-Call bewerten
+        batch_results = {}
+        for date in sorted_dates:
+            reason = self._no_fly_reason(days_data[date])
+            if reason:
+                logger.info(f"Tag {date} ohne LLM-Analyse als nicht flugbar bewertet: {reason}")
+                batch_results[date] = self._no_fly_result(date, reason, run_ts)
+        llm_dates = [d for d in sorted_dates if d not in batch_results]
+
+        # Mehrere Tage über die Batch API oder in einem einzigen LLM-Request analysieren
+        # (System-Prompt nur einmal, ein Request statt N). Gemeinsamer Request nur mit JSON-Mode,
+        # damit die Antwort zuverlässig als {"evaluations": [...]} geparst werden kann.
+        if use_batch_api and len(llm_dates) > 1:
+            batch_results.update(self._analyze_batch(days_data, days_pl_data, llm_dates, run_ts))
+        elif LLM_BATCH_DAYS and self._supports_json_mode and len(llm_dates) > 1:
+            batch_results.update(self.analyze_days_batch(days_data, days_pl_data, llm_dates, run_ts))
+
+        # Übrige Tage parallel analysieren (I/O-gebunden auf die OpenAI API), Reihenfolge bleibt erhalten
+        missing_dates = [d for d in sorted_dates if d not in batch_results]
+        if missing_dates:
+            workers = max(1, min(LLM_MAX_CONCURRENCY, len(missing_dates)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                single_results = executor.map(
+                    lambda date: self.analyze_day(days_data[date], date, days_pl_data.get(date, {}), run_ts),
+                    missing_dates
+                )
+                batch_results.update(zip(missing_dates, single_results))
+
+        results = [batch_results[d] for d in sorted_dates]
         
-        # Speichere Ergebnisse in JSON-Datei
         if results:
-            try:
-                self._save_evaluations_to_json(results)
-            except Exception as e:
-                logger.warning(f"Fehler beim Speichern der Evaluierungen: {e}")
-            
-            # E-Mail-Benachrichtigung an alle Subscriber (inkl. fester Empfänger) senden
-            if self.email_notifier:
+            # E-Mail-Versand (SMTP) im Hintergrund starten, damit er parallel zum Speichern läuft.
+            # Vor dem Return wird darauf gewartet: auf Vercel würde ein losgelöster Thread
+            # nach Ende des Requests beendet.
+            with ThreadPoolExecutor(max_workers=1) as email_executor:
+                email_future = None
+                if self.email_notifier:
+                    # E-Mail-Benachrichtigung an alle Subscriber (inkl. fester Empfänger) senden
+                    email_future = email_executor.submit(
+                        self.email_notifier.send_multi_day_to_all_subscribers, results, force_send=True
+                    )
+
+                # Speichere Ergebnisse in JSON-Datei
                 try:
-                    success, error_msg = self.email_notifier.send_multi_day_to_all_subscribers(results, force_send=True)
-                    if not success and error_msg:
-                        logger.warning(f"E-Mail-Benachrichtigung fehlgeschlagen: {error_msg}")
-                    else:
-                        logger.info(f"Konsolidierte E-Mail an alle Subscriber gesendet")
+                    self._save_evaluations_to_json(results)
                 except Exception as e:
-                    logger.warning(f"Fehler beim Senden der konsolidierten E-Mail: {e}")
+                    logger.warning(f"Fehler beim Speichern der Evaluierungen: {e}")
+
+                if email_future is not None:
+                    try:
+                        success, error_msg = email_future.result()
+                        if not success and error_msg:
+                            logger.warning(f"E-Mail-Benachrichtigung fehlgeschlagen: {error_msg}")
+                        else:
+                            logger.info(f"Konsolidierte E-Mail an alle Subscriber gesendet")
+                    except Exception as e:
+                        logger.warning(f"Fehler beim Senden der konsolidierten E-Mail: {e}")
         
         return results
     
-    def analyze_day(self, day_data: Dict, date: str) -> Dict:
-        """Analysiert einen einzelnen Tag."""
-        # Extrahiere Pressure-Level-Daten (spezieller Key)
-        pressure_level_data = day_data.pop('_pressure_levels', {})
-
-        # Kombiniere mit Standort-Info aus config.py
-        location_data = {
+    def _build_location_data(self, day_data: Dict, date: str, pressure_level_data: Dict = None) -> Dict:
+        """Kombiniert die Tagesdaten mit der Standort-Info aus config.py."""
+        return {
             'name': LOCATION['name'],
             'fluggebiet': LOCATION['fluggebiet'],
             'typ': LOCATION['typ'],
             'windrichtung': LOCATION['windrichtung'],
             'bemerkung': LOCATION['bemerkung'],
             'hourly_data': day_data,
-            'pressure_level_data': pressure_level_data,
+            'pressure_level_data': pressure_level_data or {},
             'date': date
         }
 
+    def analyze_days_batch(self, days_data: Dict[str, Dict], days_pl_data: Dict[str, Dict],
+                           dates: List[str], run_ts: str = None) -> Dict[str, Dict]:
+        """
+        Analysiert mehrere Tage mit einem einzigen LLM-Request.
+
+        Tage mit Treffer im LLM-Cache werden nicht erneut angefragt. Gibt {date: result} nur für
+        die Tage zurück, die vorliegen; fehlende Tage werden vom Aufrufer einzeln nachgefragt.
+        """
+        run_ts = run_ts or datetime.now().isoformat()
+        results = {}
+        location_data_list = []
+        cache_keys = {}
+        for d in dates:
+            location_data = self._build_location_data(days_data[d], d, days_pl_data.get(d, {}))
+            cache_keys[d] = self._feature_key(location_data)
+            cached = self._cache_lookup(cache_keys[d])
+            if cached is not None:
+                logger.info(f"LLM-Cache Treffer für {d} (gerundete Wetterdaten unverändert)")
+                results[d] = {**cached, 'location': LOCATION['name'], 'date': d, 'timestamp': run_ts}
+            else:
+                location_data_list.append(location_data)
+
+        # Ein einzelner offener Tag läuft über den normalen Pfad pro Tag
+        if len(location_data_list) < 2:
+            return results
+
+        try:
+            system_prompt, user_prompt = self._build_batch_prompt(location_data_list)
+            response_json = self._request_llm(system_prompt, user_prompt)
+            evaluations = self._parse_batch_response(response_json)
+        except Exception as e:
+            logger.warning(f"Batch-Analyse fehlgeschlagen, analysiere Tage einzeln: {e}")
+            return results
+
+        for result in evaluations:
+            date = result.get('date')
+            if date in dates and date not in results:
+                self._cache_store(cache_keys[date], result)
+                result['location'] = LOCATION['name']
+                result['timestamp'] = run_ts
+                results[date] = result
+
+        missing = [d for d in dates if d not in results]
+        if missing:
+            logger.warning(f"Batch-Antwort unvollständig, analysiere einzeln nach: {', '.join(missing)}")
+        return results
+
+    def analyze_day(self, day_data: Dict, date: str, pressure_level_data: Dict = None, run_ts: str = None) -> Dict:
+        """
+        Analysiert einen einzelnen Tag (day_data und pressure_level_data werden nicht verändert).
+
+        run_ts: Zeitstempel des Analyse-Laufs (alle Tage eines Laufs teilen ihn), Standard: jetzt.
+        """
+        run_ts = run_ts or datetime.now().isoformat()
+
+        reason = self._no_fly_reason(day_data)
+        if reason:
+            logger.info(f"Tag {date} ohne LLM-Analyse als nicht flugbar bewertet: {reason}")
+            return self._no_fly_result(date, reason, run_ts)
+
+        location_data = self._build_location_data(day_data, date, pressure_level_data)
+
         # LLM-Analyse durchführen
         try:
             result = self._analyze_with_llm(location_data)
             result['location'] = LOCATION['name']
             result['date'] = date
-            result['timestamp'] = datetime.now().isoformat()
+            result['timestamp'] = run_ts
             
             return result
         except Exception as e:
@@ -151,158 +536,179 @@ class LocationEvaluator:
                 "details": {"wind": "", "thermik": "", "risks": f"Systemfehler: {str(e)}"},
                 "recommendation": "Bitte später erneut versuchen.",
                 "sectors": [],
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": run_ts,
                 "location": LOCATION['name'],
                 "date": date
             }
     
-    def _filter_flight_hours(self, hourly_data: Dict, start_hour: int, end_hour: int) -> Dict:
-        """Filtert Stunden-Daten auf Flugstunden (start_hour <= Stunde < end_hour)."""
-        filtered = {}
-        for timestamp, data in hourly_data.items():
-            try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                hour = dt.hour
-                if start_hour <= hour < end_hour:
-                    filtered[timestamp] = data
-            except Exception as e:
-                logger.warning(f"Fehler beim Parsen von {timestamp}: {e}")
-                continue
-        return filtered
-    
-    def _group_by_days(self, hourly_data: Dict, pressure_level_data: Dict = None) -> Dict[str, Dict]:
-        """Gruppiert Stunden-Daten nach Tagen und filtert auf Flugstunden."""
+    @staticmethod
+    def _no_fly_reason(day_data: Dict) -> Optional[str]:
+        """Grund, falls der Tag ohne LLM eindeutig nicht flugbar ist (keine Daten, Sturmböen, starker Regen), sonst None."""
+        if not day_data:
+            return "Keine Wetterdaten für die Flugstunden"
+        max_gust = max((h.get('wind_gusts_10m') or 0) for h in day_data.values())
+        if max_gust > NO_FLY_MAX_GUST:
+            return f"Sturmböen bis {max_gust:.0f} km/h"
+        total_precip = sum((h.get('precipitation') or 0) for h in day_data.values())
+        if total_precip > NO_FLY_TOTAL_PRECIP:
+            return f"Starker Niederschlag ({total_precip:.1f} mm während der Flugstunden)"
+        return None
+
+    def _no_fly_result(self, date: str, reason: str, run_ts: str) -> Dict:
+        """Lokal erstelltes Ergebnis für einen eindeutig unfliegbaren Tag (gleiches Schema wie die LLM-Antwort)."""
+        result = self._validate_result({
+            "flyable": False,
+            "rating": 1,
+            "conditions": "DANGEROUS",
+            "day_summary": f"Nicht flugbar: {reason}.",
+            "golden_window": None,
+            "details": {"wind": "", "thermik": "", "risks": reason},
+            "recommendation": "Heute nicht fliegen.",
+            "sectors": [],
+        })
+        result['location'] = LOCATION['name']
+        result['date'] = date
+        result['timestamp'] = run_ts
+        return result
+
+    def _group_by_days(self, hourly_data: Dict, pressure_level_data: Dict = None) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        Gruppiert Stunden- und Pressure-Level-Daten nach Tagen und filtert auf Flugstunden.
+
+        Returns:
+            Tuple (days_data, days_pl_data), jeweils {date: {timestamp: data}}
+        """
         if pressure_level_data is None:
             pressure_level_data = {}
 
-        # Gruppiere zuerst nach Tagen
-        days_data = {}
-        for timestamp, data in hourly_data.items():
+        return self._group_flight_hours(hourly_data), self._group_flight_hours(pressure_level_data)
+
+    @staticmethod
+    def _group_flight_hours(timed_data: Dict) -> Dict[str, Dict]:
+        """
+        Gruppiert Zeitstempel-Daten in einem Durchlauf nach Datum und behält nur Flugstunden.
+
+        Die Zeitstempel werden hier einmalig sortiert; Tage und Stunden im Ergebnis sind
+        chronologisch geordnet, nachgelagerte Formatierer müssen nicht erneut sortieren.
+        """
+        timestamps = sorted(timed_data)
+        days = {}
+        # Schneller Pfad ohne try/except pro Zeile
+        try:
+            for timestamp in timestamps:
+                date_key, hour = _split_timestamp(timestamp)
+                day = days.setdefault(date_key, {})
+                if FLIGHT_HOURS_START <= hour < FLIGHT_HOURS_END:
+                    day[timestamp] = timed_data[timestamp]
+            return days
+        except ValueError:
+            pass
+
+        # Fallback: Zeile für Zeile, ungültige Zeitstempel überspringen
+        days = {}
+        for timestamp in timestamps:
             try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                date_key = dt.strftime("%Y-%m-%d")
-                if date_key not in days_data:
-                    days_data[date_key] = {}
-                days_data[date_key][timestamp] = data
+                date_key, hour = _split_timestamp(timestamp)
             except Exception as e:
                 logger.warning(f"Fehler beim Gruppieren von {timestamp}: {e}")
                 continue
+            day = days.setdefault(date_key, {})
+            if FLIGHT_HOURS_START <= hour < FLIGHT_HOURS_END:
+                day[timestamp] = timed_data[timestamp]
+        return days
 
-        # Gruppiere Pressure-Level-Daten nach Tagen
-        days_pl_data = {}
-        for timestamp, pl_data in pressure_level_data.items():
-            try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                date_key = dt.strftime("%Y-%m-%d")
-                if date_key not in days_pl_data:
-                    days_pl_data[date_key] = {}
-                days_pl_data[date_key][timestamp] = pl_data
-            except Exception:
-                continue
-
-        # Filtere dann innerhalb jedes Tages auf Flugstunden
-        filtered_days_data = {}
-        for date_key, day_hourly_data in days_data.items():
-            flight_hours_data = self._filter_flight_hours(day_hourly_data, FLIGHT_HOURS_START, FLIGHT_HOURS_END)
-            # Pressure-Level-Daten für diesen Tag anhängen (als spezieller Key)
-            flight_hours_data['_pressure_levels'] = days_pl_data.get(date_key, {})
-            filtered_days_data[date_key] = flight_hours_data
-
-        return filtered_days_data
-    
     def _load_weather_data(self) -> Dict:
         """Lädt Wetterdaten für Uetliberg aus JSON-Datei."""
         path = Path(self.weather_json_path)
         if not path.exists():
             raise FileNotFoundError(f"Wetterdaten nicht gefunden: {self.weather_json_path}")
         
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Geparste Daten nur lesen, nicht verändern (werden zwischen Läufen geteilt)
+        data = _load_weather_file(str(path), path.stat().st_mtime_ns)
         
-        # Suche Uetliberg Eintrag
+        # Suche Uetliberg Eintrag. Flache Kopie: Aufrufer können Top-Level-Keys setzen/ersetzen,
+        # ohne den gecachten Eintrag zu verändern (Stunden-Dicts bleiben geteilt und werden nur gelesen)
         for key in data.keys():
             if 'uetliberg' in key.lower() or 'balderen' in key.lower():
-                return data[key]
+                return dict(data[key])
         
         raise ValueError(f"Keine Wetterdaten für Uetliberg gefunden")
     
-    def _format_hourly_data(self, hourly_data: Dict, pressure_level_data: Dict = None, hours: int = 6) -> str:
-        """Formatiert stündliche Daten für Prompt inkl. Thermik-Berechnungen (nur Flugstunden)."""
+    def _format_hourly_data(self, hourly_data: Dict, pressure_level_data: Dict = None, hours: int = 6,
+                            timestamps: List[str] = None) -> str:
+        """
+        Formatiert stündliche Daten für Prompt inkl. Thermik-Berechnungen (nur Flugstunden).
+
+        timestamps: bereits gefilterte Flugstunden (z.B. aus _build_prompt), spart die erneute Filterung.
+        """
         if not hourly_data:
             return "Keine stündlichen Daten verfügbar"
         
         if pressure_level_data is None:
             pressure_level_data = {}
+        if timestamps is None:
+            timestamps = self._flight_timestamps(hourly_data)
             
-        sorted_times = sorted(hourly_data.keys())
         lines = []
-        count = 0
+        format_row = _HOUR_ROW_TMPL.format
         
-        for timestamp in sorted_times:
-            # Filtere auf Flugstunden
-            try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                if not (FLIGHT_HOURS_START <= dt.hour < FLIGHT_HOURS_END):
-                    continue
-            except Exception:
-                continue
-                
-            if count >= hours:
-                break
-            count += 1
-            
+        # hourly_data ist bereits chronologisch sortiert (einmalig in _group_flight_hours)
+        for timestamp in timestamps[:hours]:
             data = hourly_data[timestamp]
+            get = data.get
             time_str = timestamp.replace('T', ' ')[:16]
             
-            temp = data.get('temperature_2m', 'N/A')
-            wind_speed = data.get('wind_speed_10m', 'N/A')
-            wind_dir = data.get('wind_direction_10m', 'N/A')
-            wind_gusts = data.get('wind_gusts_10m', 'N/A')
-            cloud_base_raw = data.get('cloud_base')
-            cloud_base = f"{cloud_base_raw}m" if cloud_base_raw is not None else 'wolkenfrei'
-            cloud_cover = data.get('cloud_cover', 'N/A')
-            cape = data.get('cape', 'N/A')
-            precip = data.get('precipitation', 'N/A')
-            sunshine = data.get('sunshine_duration', 'N/A')
-
-            if isinstance(sunshine, (int, float)) and sunshine > 0:
-                sunshine_str = f"{sunshine / 3600:.1f}h"
-            else:
-                sunshine_str = "0h"
+            # Auf die für das LLM relevante Genauigkeit runden (spart Prompt-Tokens)
+            temp = _round_num(get('temperature_2m', 'N/A'))
+            wind_speed = _round_num(get('wind_speed_10m', 'N/A'), 1)
+            wind_dir = _round_num(get('wind_direction_10m', 'N/A'))
+            wind_gusts = _round_num(get('wind_gusts_10m', 'N/A'), 1)
+            cloud_base_raw = get('cloud_base')
+            cloud_base = f"{_round_num(cloud_base_raw)}m" if cloud_base_raw is not None else 'wolkenfrei'
+            cloud_cover = _round_num(get('cloud_cover', 'N/A'))
+            cape = _round_num(get('cape', 'N/A'))
+            precip = get('precipitation', 'N/A')
+            # Sonnenscheindauer fliesst bereits in den THERMIK-PROXY ein, eigene Spalte nur auf Wunsch
+            sunshine_str = ""
+            if PROMPT_INCLUDE_SUNSHINE:
+                sunshine = get('sunshine_duration')
+                hours_sun = sunshine / 3600 if isinstance(sunshine, (int, float)) and sunshine > 0 else 0
+                sunshine_str = f" | Sonne {hours_sun:.1f}h"
 
             # Neues Top-Modell für Thermikberechnung nutzen
             thermal_info = ""
             try:
                 p_levels = []
-                for level in [1000, 975, 950, 925, 900, 875, 850, 825, 800, 775, 750, 700, 600]:
-                    h_val = pressure_level_data.get(timestamp, {}).get(f'geopotential_height_{level}hPa')
-                    t_val = pressure_level_data.get(timestamp, {}).get(f'temperature_{level}hPa')
+                pl_row = pressure_level_data.get(timestamp, {})
+                for level, h_key, t_key in _THERMAL_PL_KEYS:
+                    h_val = pl_row.get(h_key)
+                    t_val = pl_row.get(t_key)
                     if h_val is not None and t_val is not None:
                         p_levels.append({'pressure': level, 'height': h_val, 'temp': t_val})
 
                 from thermik_calculator import calculate_thermal_profile, calculate_dewpoint
-                surf_dew = calculate_dewpoint(data.get('temperature_2m'), data.get('relative_humidity_2m', 50))
+                surf_dew = calculate_dewpoint(get('temperature_2m'), get('relative_humidity_2m', 50))
 
                 therm = calculate_thermal_profile(
-                    surface_temp=data.get('temperature_2m'),
+                    surface_temp=get('temperature_2m'),
                     surface_dewpoint=surf_dew,
                     elevation_m=LOCATION.get('elevation_ref', 850.0),
                     pressure_levels_data=p_levels,
-                    boundary_layer_height_agl=data.get('boundary_layer_height'),
-                    sunshine_duration_s=data.get('sunshine_duration'),
-                    surface_sensible_heat_flux=data.get('surface_sensible_heat_flux'),
-                    surface_latent_heat_flux=data.get('surface_latent_heat_flux'),
-                    shortwave_radiation=data.get('shortwave_radiation'),
-                    direct_radiation=data.get('direct_radiation'),
-                    diffuse_radiation=data.get('diffuse_radiation'),
-                    soil_moisture=data.get('soil_moisture_0_to_1cm'),
-                    soil_temperature=data.get('soil_temperature_0cm'),
-                    updraft=data.get('updraft'),
-                    et0=data.get('et0_fao_evapotranspiration'),
-                    vpd=data.get('vapour_pressure_deficit'),
-                    lifted_index=data.get('lifted_index'),
-                    convective_inhibition=data.get('convective_inhibition'),
-                    snow_depth=data.get('snow_depth'),
+                    boundary_layer_height_agl=get('boundary_layer_height'),
+                    sunshine_duration_s=get('sunshine_duration'),
+                    surface_sensible_heat_flux=get('surface_sensible_heat_flux'),
+                    surface_latent_heat_flux=get('surface_latent_heat_flux'),
+                    shortwave_radiation=get('shortwave_radiation'),
+                    direct_radiation=get('direct_radiation'),
+                    diffuse_radiation=get('diffuse_radiation'),
+                    soil_moisture=get('soil_moisture_0_to_1cm'),
+                    soil_temperature=get('soil_temperature_0cm'),
+                    updraft=get('updraft'),
+                    et0=get('et0_fao_evapotranspiration'),
+                    vpd=get('vapour_pressure_deficit'),
+                    lifted_index=get('lifted_index'),
+                    convective_inhibition=get('convective_inhibition'),
+                    snow_depth=get('snow_depth'),
                     timestamp=timestamp,
                     slope_azimuth=LOCATION.get('slope_azimuth'),
                     slope_angle=LOCATION.get('slope_angle'),
@@ -319,68 +725,115 @@ class LocationEvaluator:
                 err_str = traceback.format_exc().split('\n')[-2]
                 thermal_info = f" | Thermik-Fehler: {e} ({err_str})"
 
-            line = (
-                f"{time_str}: Temp {temp}°C | "
-                f"Wind {wind_speed}km/h aus {wind_dir}° (Böen {wind_gusts}km/h) | "
-                f"Wolkenbasis {cloud_base} | Bewölkung {cloud_cover}% | "
-                f"CAPE {cape} J/kg | Niederschlag {precip}mm | Sonne {sunshine_str}"
-                f"{thermal_info}"
-            )
-            lines.append(line)
+            lines.append(format_row(
+                ts=time_str, t=temp, ws=wind_speed, wd=wind_dir, wg=wind_gusts,
+                cb=cloud_base, cc=cloud_cover, cp=cape, pp=precip, sun=sunshine_str, thermal=thermal_info,
+            ))
         
         return "\n".join(lines)
     
+    @staticmethod
+    def _flight_timestamps(timed_data: Dict) -> List[str]:
+        """Zeitstempel innerhalb der Flugstunden (in bestehender Reihenfolge), ungültige werden übersprungen."""
+        timestamps = []
+        for timestamp in timed_data:
+            try:
+                if FLIGHT_HOURS_START <= _split_timestamp(timestamp)[1] < FLIGHT_HOURS_END:
+                    timestamps.append(timestamp)
+            except ValueError:
+                continue
+        return timestamps
+
     def _format_altitude_wind_profile(self, pressure_level_data: Dict, hours: int = 6) -> str:
         """Formatiert Höhenwind-Daten für LLM-Prompt (nur Flugstunden, reduzierte Level)."""
         if not pressure_level_data:
             return "Keine Höhenwind-Daten verfügbar"
 
-        sorted_times = sorted(pressure_level_data.keys())
-        lines = []
-        count = 0
+        profile = "\n".join(self._iter_profile_lines(pressure_level_data, hours))
+        return profile or "Keine Höhenwind-Daten verfügbar"
 
-        # Sende nur 3 kritische Level, um Tokens zu sparen (Boden/Inversion, mittlere Höhe, Scherungs-Höhe)
-        # 850hPa (~1500m), 700hPa (~3000m), 500hPa (~5500m)
-        REDUCED_LEVELS = [850, 700, 500]
+    @staticmethod
+    def _iter_profile_lines(pressure_level_data: Dict, hours: int):
+        """Liefert die Höhenwind-Zeilen (Stunden-Header + Level-Zeilen) ohne Zwischenlisten."""
+        count = 0
 
-        for timestamp in sorted_times:
+        # pressure_level_data ist bereits chronologisch sortiert (einmalig in _group_flight_hours)
+        for timestamp, data in pressure_level_data.items():
             # Filtere auf Flugstunden
             try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                if not (FLIGHT_HOURS_START <= dt.hour < FLIGHT_HOURS_END):
+                if not (FLIGHT_HOURS_START <= _split_timestamp(timestamp)[1] < FLIGHT_HOURS_END):
                     continue
-            except Exception:
+            except ValueError:
                 continue
 
             if count >= hours:
                 break
             count += 1
 
-            data = pressure_level_data[timestamp]
-            time_str = timestamp.replace('T', ' ')[:16]
-
-            altitude_data = []
-            for level in REDUCED_LEVELS:
-                height = data.get(f'geopotential_height_{level}hPa')
-                wind_speed = data.get(f'wind_speed_{level}hPa')
-                wind_dir = data.get(f'wind_direction_{level}hPa')
-                temp = data.get(f'temperature_{level}hPa')
+            # Header nur ausgeben, wenn die Stunde mindestens ein gültiges Level hat
+            header = f"\n{timestamp.replace('T', ' ')[:16]}:"
+            for level, h_key, ws_key, wd_key, t_key in _WIND_PROFILE_KEYS:
+                height = data.get(h_key)
+                wind_speed = data.get(ws_key)
 
                 if height is not None and wind_speed is not None and isinstance(height, (int, float)):
+                    if header:
+                        yield header
+                        header = None
+                    wind_dir = data.get(wd_key)
+                    temp = data.get(t_key)
                     dir_str = f" aus {wind_dir:.0f}°" if wind_dir is not None else ""
                     temp_str = f", Temp {temp:.1f}°C" if temp is not None else ""
-                    altitude_data.append(
-                        f"  {int(height)}m MSL ({level}hPa): Wind {wind_speed:.1f}km/h{dir_str}{temp_str}"
-                    )
+                    yield f"  {int(height)}m MSL ({level}hPa): Wind {wind_speed:.1f}km/h{dir_str}{temp_str}"
 
-            if altitude_data:
-                lines.append(f"\n{time_str}:")
-                lines.extend(altitude_data)
+    def _get_foehn_info(self) -> str:
+        """Lädt und formatiert den Föhn-Indikator einmal pro Evaluator (thread-sicher)."""
+        with self._foehn_lock:
+            if self._foehn_info is not None:
+                return self._foehn_info
 
-        return "\n".join(lines) if lines else "Keine Höhenwind-Daten verfügbar"
+            foehn_info = ""
+            try:
+                from foehn_indicators import get_foehn_for_dashboard
+                foehn_result = get_foehn_for_dashboard(forecast_days=2)
+                if foehn_result.get('success') and foehn_result.get('foehn'):
+                    f = foehn_result['foehn']
+                    foehn_lines = ["\nFÖHN-INDIKATOR (Süd→Nord, Lugano→Zürich):"]
+                    foehn_lines.append(f"  Level: {f.get('level', 'none').upper()}")
+                    if f.get('delta_p_hpa') is not None:
+                        foehn_lines.append(f"  Delta-P (Süd-Nord): {f['delta_p_hpa']} hPa")
+                    if f.get('crest_wind_kmh') is not None:
+                        dir_str = f" aus {f['crest_dir_deg']}°" if f.get('crest_dir_deg') is not None else ""
+                        foehn_lines.append(f"  Kammwind 700hPa: {f['crest_wind_kmh']} km/h{dir_str}")
+                    if f.get('humidity_nord') is not None:
+                        foehn_lines.append(f"  Luftfeuchtigkeit Nordseite: {f['humidity_nord']}%")
+                    if f.get('gust_ratio') is not None:
+                        foehn_lines.append(f"  Böigkeit-Ratio: {f['gust_ratio']}")
+                    indicators = f.get('indicators', [])
+                    if indicators:
+                        foehn_lines.append(f"  Indikatoren: {'; '.join(indicators)}")
+                    foehn_info = "\n".join(foehn_lines) + "\n"
+                    logger.info(f"Föhn-Daten in Prompt eingefügt: Level={f.get('level')}")
+            except Exception as e:
+                logger.warning(f"Föhn-Daten konnten nicht geladen werden: {e}")
+                foehn_info = ""
+
+            self._foehn_info = foehn_info
+            return foehn_info
 
     def _build_prompt(self, location_data: Dict) -> Tuple[str, str]:
-        """Erstellt System- und User-Prompt."""
+        """Erstellt System- und User-Prompt (memoisiert pro Evaluator über einen Hash der Tagesdaten)."""
+        key = _fingerprint(location_data)
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+        prompts = self._render_prompt(location_data)
+        self._prompt_cache[key] = prompts
+        return prompts
+
+    def _render_prompt(self, location_data: Dict) -> Tuple[str, str]:
+        """Formatiert System- und User-Prompt aus den Tagesdaten."""
         bemerkungen = location_data.get('bemerkung', '')
         bemerkungen_list = [b.strip() for b in bemerkungen.split('|') if b.strip()] if bemerkungen else []
 
@@ -388,46 +841,24 @@ class LocationEvaluator:
         pressure_level_data = location_data.get('pressure_level_data', {})
         date = location_data.get('date', '')
 
-        # Ermittle Anzahl der echten Flugstunden in den Daten um hours-Limit richtig zu setzen
-        total_flight_hours = 0
-        for ts in hourly_data.keys():
-            try:
-                if FLIGHT_HOURS_START <= datetime.fromisoformat(ts.replace('Z', '+00:00')).hour < FLIGHT_HOURS_END:
-                    total_flight_hours += 1
-            except: pass
+        # Flugstunden einmal ermitteln: Anzahl für das hours-Limit und Liste für die Formatierung.
+        # Bei mehr als PROMPT_MAX_HOURS Stunden gleichmässig ausdünnen (Prompt-Tokens skalieren linear)
+        flight_timestamps = self._flight_timestamps(hourly_data)
+        if PROMPT_MAX_HOURS > 0 and len(flight_timestamps) > PROMPT_MAX_HOURS:
+            step = -(-len(flight_timestamps) // PROMPT_MAX_HOURS)
+            flight_timestamps = flight_timestamps[::step]
+        total_flight_hours = len(flight_timestamps)
 
         # Formatiere alle verfügbaren Flugstunden
-        formatted_hours = self._format_hourly_data(hourly_data, pressure_level_data, hours=total_flight_hours)
+        formatted_hours = self._format_hourly_data(
+            hourly_data, pressure_level_data, hours=total_flight_hours, timestamps=flight_timestamps
+        )
 
         # Formatiere Höhenwind-Daten (auch hier nur Flugstunden, z.B. die ersten 10)
         formatted_altitude_wind = self._format_altitude_wind_profile(pressure_level_data, hours=10)
 
-        # Föhn-Indikator-Daten laden und formatieren
-        foehn_info = ""
-        try:
-            from foehn_indicators import get_foehn_for_dashboard
-            foehn_result = get_foehn_for_dashboard(forecast_days=2)
-            if foehn_result.get('success') and foehn_result.get('foehn'):
-                f = foehn_result['foehn']
-                foehn_lines = ["\nFÖHN-INDIKATOR (Süd→Nord, Lugano→Zürich):"]
-                foehn_lines.append(f"  Level: {f.get('level', 'none').upper()}")
-                if f.get('delta_p_hpa') is not None:
-                    foehn_lines.append(f"  Delta-P (Süd-Nord): {f['delta_p_hpa']} hPa")
-                if f.get('crest_wind_kmh') is not None:
-                    dir_str = f" aus {f['crest_dir_deg']}°" if f.get('crest_dir_deg') is not None else ""
-                    foehn_lines.append(f"  Kammwind 700hPa: {f['crest_wind_kmh']} km/h{dir_str}")
-                if f.get('humidity_nord') is not None:
-                    foehn_lines.append(f"  Luftfeuchtigkeit Nordseite: {f['humidity_nord']}%")
-                if f.get('gust_ratio') is not None:
-                    foehn_lines.append(f"  Böigkeit-Ratio: {f['gust_ratio']}")
-                indicators = f.get('indicators', [])
-                if indicators:
-                    foehn_lines.append(f"  Indikatoren: {'; '.join(indicators)}")
-                foehn_info = "\n".join(foehn_lines) + "\n"
-                logger.info(f"Föhn-Daten in Prompt eingefügt: Level={f.get('level')}")
-        except Exception as e:
-            logger.warning(f"Föhn-Daten konnten nicht geladen werden: {e}")
-            foehn_info = ""
+        # Föhn-Indikator-Daten (einmal pro Evaluator geladen, für alle Tage gleich)
+        foehn_info = self._get_foehn_info()
 
         # Höhenwind-Sektion (nur wenn Daten vorhanden)
         altitude_wind_section = ""
@@ -451,32 +882,231 @@ class LocationEvaluator:
         ) + flight_hours_info + altitude_wind_section
 
         return LLM_SYSTEM_PROMPT, user_prompt
-    
+
+    def _build_batch_prompt(self, location_data_list: List[Dict]) -> Tuple[str, str]:
+        """Erstellt einen gemeinsamen Prompt für mehrere Tage (Antwort als JSON-Array)."""
+        sections = []
+        for i, location_data in enumerate(location_data_list, 1):
+            _, day_prompt = self._build_prompt(location_data)
+            sections.append(f"### TAG {i} ({location_data.get('date', '')})\n{day_prompt}")
+
+        instructions = (
+            "\n\nWICHTIG: Bewerte JEDEN der obigen Tage separat im gewohnten JSON-Format. "
+            "Antworte mit genau einem JSON-Objekt der Form "
+            '{"evaluations": [{"date": "YYYY-MM-DD", ...}, ...]} '
+            "mit einem Eintrag pro Tag in derselben Reihenfolge."
+        )
+        return LLM_SYSTEM_PROMPT, "\n\n".join(sections) + instructions
+
     def _analyze_with_llm(self, location_data: Dict) -> Dict:
-        """Sendet aufbereitete Daten an OpenAI GPT."""
-        # Prüfe API-Key
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY nicht gesetzt")
-        
-        if not self.api_key.startswith('sk-'):
-            logger.warning(f"API-Key scheint ungültig zu sein (sollte mit 'sk-' beginnen)")
-        
+        """
+        Sendet aufbereitete Daten an OpenAI GPT.
+
+        Zwei Cache-Stufen: zuerst der exakte Cache (SHA-256 über den Prompt), erst bei einem
+        Fehlschlag der gröbere Feature-Cache (gerundete Wetterdaten, siehe _feature_key).
+        """
         system_prompt, user_prompt = self._build_prompt(location_data)
-        
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        
-        json_supported_models = ["gpt-4-turbo", "gpt-4-turbo-preview", "gpt-4-0125-preview", "gpt-4o", "gpt-4o-mini", "gpt-4.1-mini", "gpt-4.1-nano", "gpt-3.5-turbo"]
-        
+
+        # Exakter Cache: identischer Prompt (gleiche Wetterdaten, gleiches Modell) → kein API-Call
+        exact_path = self._exact_cache_path(system_prompt, user_prompt)
+        result = _read_exact_cache(exact_path)
+        if result is not None:
+            logger.info(f"LLM-Cache Treffer für {location_data.get('date')} (identischer Prompt)")
+            return result
+
+        cache_key = self._feature_key(location_data)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            logger.info(f"LLM-Cache Treffer für {location_data.get('date')} (gerundete Wetterdaten unverändert)")
+            return cached
+
+        result = self._parse_llm_response(self._request_llm(system_prompt, user_prompt))
+        _write_exact_cache(exact_path, result)
+        self._cache_store(cache_key, result)
+        return result
+
+    def _exact_cache_path(self, system_prompt: str, user_prompt: str) -> Path:
+        """Pfad des exakten Cache-Eintrags: SHA-256 über Modell, System- und User-Prompt."""
+        raw = json.dumps({"model": self.model, "system": system_prompt, "user": user_prompt}, sort_keys=True)
+        key = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        return get_data_dir() / LLM_EXACT_CACHE_DIRNAME / f"{key}.json"
+
+    def _feature_key(self, location_data: Dict) -> str:
+        """
+        Fingerprint aller prompt-relevanten Eingaben, Wetterdaten gerundet.
+
+        Enthält Boden-Features (_CACHE_FEATURES), Druckniveau-Werte (_CACHE_PL_FEATURES: Thermik-Profil
+        und Höhenwind) sowie den Kontext, der nicht aus den Stundenwerten stammt: Standort-Metadaten,
+        Föhn-Block, Prompts und Flugstunden. Kleine Änderungen zwischen zwei Modellläufen (z.B. 0.04°C)
+        ergeben denselben Schlüssel; geänderte Höhenwinde, Föhn-Lage oder Standort-Config nicht.
+        """
+        features = [
+            [ts] + [_round_num(data.get(field), ndigits) for field, ndigits in _CACHE_FEATURES]
+            for ts, data in location_data.get('hourly_data', {}).items()
+        ]
+        pl_features = [
+            [ts] + [_round_num(data.get(field), ndigits) for field, ndigits in _CACHE_PL_FEATURES]
+            for ts, data in location_data.get('pressure_level_data', {}).items()
+        ]
+        context = [
+            [location_data.get(field) for field in ('name', 'fluggebiet', 'typ', 'windrichtung', 'bemerkung')],
+            LOCATION.get('elevation_ref'),
+            self._get_foehn_info(),
+            LLM_SYSTEM_PROMPT,
+            LLM_USER_PROMPT_TEMPLATE,
+            FLIGHT_HOURS_START,
+            FLIGHT_HOURS_END,
+            PROMPT_INCLUDE_SUNSHINE,
+        ]
+        return _fingerprint([self.model, location_data.get('date'), features, pl_features, context])
+
+    def _cache_lookup(self, key: str):
+        """Liefert eine Kopie eines gecachten LLM-Ergebnisses (jünger als LLM_CACHE_TTL) oder None."""
+        if LLM_CACHE_TTL <= 0:
+            return None
+        with _LLM_CACHE_LOCK:
+            entry = _load_llm_cache().get(key)
+        if entry is not None and time.time() - entry.get('ts', 0) < LLM_CACHE_TTL:
+            # Kopie: Aufrufer ergänzen location/date/timestamp, der geteilte Eintrag bleibt unverändert
+            return copy.deepcopy(entry.get('result'))
+        return None
+
+    def _cache_store(self, key: str, result: Dict) -> None:
+        """Hängt ein LLM-Ergebnis als eine Zeile an den Cache an (Aufräumen passiert beim Laden)."""
+        global _llm_cache_stat
+        if LLM_CACHE_TTL <= 0:
+            return
+        entry = {'key': key, 'ts': time.time(), 'result': copy.deepcopy(result)}
+        try:
+            with _LLM_CACHE_LOCK:
+                entries = _load_llm_cache()
+                path = _llm_cache_path()
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                entries[key] = entry
+                st = path.stat()
+                # Eigenes Anhängen löst kein erneutes Lesen aus; Änderungen anderer Prozesse schon
+                _llm_cache_stat = (st.st_mtime_ns, st.st_size)
+        except Exception as e:
+            logger.warning(f"LLM-Cache konnte nicht geschrieben werden: {e}")
+
+    def _build_payload(self, system_prompt: str, user_prompt: str) -> Dict:
+        """Erstellt den Chat-Completion Request-Body."""
         payload = {
             "model": self.model,
             "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            "temperature": 0.3
+            # CACHE_DETERMINISTIC: temperature 0, damit gecachte Antworten semantisch gültig sind
+            "temperature": 0.0 if os.environ.get("CACHE_DETERMINISTIC") else 0.3
         }
         
-        if any(model in self.model for model in json_supported_models):
+        if self._supports_json_mode:
             payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def _analyze_batch(self, days_data: Dict[str, Dict], days_pl_data: Dict[str, Dict],
+                       dates: List[str], run_ts: str = None) -> Dict[str, Dict]:
+        """
+        Wertet alle Tage über die OpenAI Batch API aus (/v1/files + /v1/batches).
+
+        Gibt {date: result} für alle erfolgreich ausgewerteten Tage zurück; bei Fehlern oder
+        fehlenden Tagen übernimmt der Aufrufer den normalen Pfad pro Tag.
+        """
+        lines = []
+        for date in dates:
+            location_data = self._build_location_data(days_data[date], date, days_pl_data.get(date, {}))
+            system_prompt, user_prompt = self._build_prompt(location_data)
+            lines.append(json.dumps({
+                "custom_id": date,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_payload(system_prompt, user_prompt),
+            }, ensure_ascii=False))
+
+        try:
+            # Upload der JSONL-Datei (multipart: Content-Type der Session wird hier entfernt)
+            upload = self._session.post(
+                f"{OPENAI_API_BASE}/files",
+                files={"file": ("ticker_batch.jsonl", "\n".join(lines).encode('utf-8'))},
+                data={"purpose": "batch"},
+                headers={"Content-Type": None},
+                timeout=60,
+            )
+            upload.raise_for_status()
+
+            batch = self._session.post(
+                f"{OPENAI_API_BASE}/batches",
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h",
+                },
+                timeout=30,
+            )
+            batch.raise_for_status()
+            batch_info = batch.json()
+            logger.info(f"OpenAI Batch erstellt: {batch_info['id']} ({len(dates)} Tage)")
+
+            # Auf Abschluss warten
+            deadline = time.time() + LLM_BATCH_API_MAX_WAIT
+            while batch_info.get("status") not in ("completed", "failed", "expired", "cancelled"):
+                if time.time() > deadline:
+                    raise TimeoutError(f"Batch {batch_info['id']} nicht rechtzeitig abgeschlossen")
+                time.sleep(LLM_BATCH_API_POLL_INTERVAL)
+                status = self._session.get(f"{OPENAI_API_BASE}/batches/{batch_info['id']}", timeout=30)
+                status.raise_for_status()
+                batch_info = status.json()
+                logger.info(f"OpenAI Batch Status: {batch_info.get('status')}")
+
+            if batch_info.get("status") != "completed" or not batch_info.get("output_file_id"):
+                raise Exception(f"Batch {batch_info['id']} beendet mit Status {batch_info.get('status')}")
+
+            output = self._session.get(
+                f"{OPENAI_API_BASE}/files/{batch_info['output_file_id']}/content", timeout=60
+            )
+            output.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Batch API fehlgeschlagen, analysiere Tage einzeln: {e}")
+            return {}
+
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json_loads(line)
+                date = entry.get("custom_id")
+                response = entry.get("response") or {}
+                if date not in dates or response.get("status_code") != 200:
+                    continue
+                result = self._parse_llm_response(response["body"])
+                result['location'] = LOCATION['name']
+                result['date'] = date
+                result['timestamp'] = run_ts or datetime.now().isoformat()
+                results[date] = result
+            except Exception as e:
+                logger.warning(f"Batch-Ergebnis konnte nicht verarbeitet werden: {e}")
+
+        missing = [d for d in dates if d not in results]
+        if missing:
+            logger.warning(f"Batch API unvollständig, analysiere einzeln nach: {', '.join(missing)}")
+        return results
+
+    def _request_llm(self, system_prompt: str, user_prompt: str) -> Dict:
+        """Führt den OpenAI Chat-Completion Request inkl. Retries aus und gibt die Roh-Antwort zurück."""
+        import requests
+
+        # Prüfe API-Key
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY nicht gesetzt")
+        
+        if not self.api_key.startswith('sk-'):
+            logger.warning(f"API-Key scheint ungültig zu sein (sollte mit 'sk-' beginnen)")
         
+        url = f"{OPENAI_API_BASE}/chat/completions"
+        payload = self._build_payload(system_prompt, user_prompt)
+        if LLM_STREAM:
+            payload["stream"] = True
+
         logger.info(f"OpenAI API Call: Model={self.model}, Prompt-Länge: System={len(system_prompt)}, User={len(user_prompt)}")
         
         max_retries = 3
@@ -486,27 +1116,41 @@ class LocationEvaluator:
         for attempt in range(max_retries):
             try:
                 logger.debug(f"API Call Versuch {attempt + 1}/{max_retries}")
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
-                
-                if response.status_code == 200:
-                    logger.info("OpenAI API Call erfolgreich")
-                    return self._parse_llm_response(response.json())
-                elif response.status_code == 429:
-                    wait_time = retry_delay * (2 ** attempt) * 2
-                    logger.warning(f"Rate limit (429), warte {wait_time}s vor Retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                    continue
-                elif response.status_code == 401:
-                    error_msg = f"API Authentifizierungsfehler (401): Ungültiger API-Key? Response: {response.text[:200]}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                else:
-                    error_text = response.text[:500] if response.text else "Keine Fehlermeldung"
-                    last_error = f"API Fehler {response.status_code}: {error_text}"
-                    logger.warning(f"{last_error} (Versuch {attempt + 1}/{max_retries})")
-                    if attempt == max_retries - 1:
-                        raise Exception(last_error)
-                    time.sleep(retry_delay * (2 ** attempt))
+                # Antwort immer schließen, damit die Verbindung (auch bei stream=True) in den Pool zurückgeht
+                with self._session.post(url, json=payload, timeout=60, stream=LLM_STREAM) as response:
+                    if response.status_code == 200:
+                        if not LLM_STREAM:
+                            logger.info("OpenAI API Call erfolgreich")
+                            return response.json()
+                        # Gestreamte Antwort in die Form der normalen Chat-Completion bringen
+                        content, finish_reason = _read_sse_content(response)
+                        logger.info("OpenAI API Call erfolgreich (Stream)")
+                        return {"choices": [{"message": {"content": content}, "finish_reason": finish_reason}]}
+                    elif response.status_code == 429:
+                        last_error = "Rate limit (429)"
+                        if attempt == max_retries - 1:
+                            break
+                        # Retry-After respektieren (Sekunden), sonst exponentielles Backoff
+                        wait_time = _retry_after_seconds(response, retry_delay * (2 ** attempt) * 2)
+                        logger.warning(f"Rate limit (429), warte {wait_time}s vor Retry {attempt + 1}/{max_retries}")
+                        time.sleep(wait_time)
+                        continue
+                    elif response.status_code == 401:
+                        error_msg = f"API Authentifizierungsfehler (401): Ungültiger API-Key? Response: {response.text[:200]}"
+                        logger.error(error_msg)
+                        raise Exception(error_msg)
+                    elif response.status_code in NON_RETRYABLE_STATUS:
+                        # Ungültiger Request / unbekanntes Modell: Wiederholen bringt nichts
+                        error_msg = f"API Fehler {response.status_code} (nicht wiederholbar): {response.text[:500]}"
+                        logger.error(error_msg)
+                        raise Exception(error_msg)
+                    else:
+                        error_text = response.text[:500] if response.text else "Keine Fehlermeldung"
+                        last_error = f"API Fehler {response.status_code}: {error_text}"
+                        logger.warning(f"{last_error} (Versuch {attempt + 1}/{max_retries})")
+                        if attempt == max_retries - 1:
+                            raise Exception(last_error)
+                        time.sleep(retry_delay * (2 ** attempt))
             except requests.Timeout:
                 last_error = "OpenAI API Timeout nach 60 Sekunden"
                 logger.warning(f"{last_error} (Versuch {attempt + 1}/{max_retries})")
@@ -528,22 +1172,27 @@ class LocationEvaluator:
     
     def _parse_llm_response(self, response_json: Dict) -> Dict:
         """Extrahiert und validiert JSON aus LLM-Antwort."""
-        content = response_json['choices'][0]['message']['content']
-        result = json.loads(content)
-        
+        content = _message_content(response_json)
+        return self._validate_result(json_loads(content))
+
+    def _parse_batch_response(self, response_json: Dict) -> List[Dict]:
+        """Extrahiert und validiert die Tages-Evaluierungen aus einer Batch-Antwort."""
+        content = _message_content(response_json)
+        evaluations = json_loads(content).get('evaluations', [])
+        if not isinstance(evaluations, list):
+            raise ValueError("Batch-Antwort enthält kein 'evaluations'-Array")
+        return [self._validate_result(r) for r in evaluations if isinstance(r, dict)]
+
+    def _validate_result(self, result: Dict) -> Dict:
+        """Validiert ein einzelnes Evaluierungs-Objekt und ergänzt fehlende Felder."""
         # Validiere kritische Felder, aber behalte alle Details vollständig
-        if 'flyable' not in result:
-            result['flyable'] = False
-        if 'details' not in result or not isinstance(result['details'], dict):
-            result['details'] = {}
+        details = result.get('details')
+        if not isinstance(details, dict):
+            details = result['details'] = {}
         
         # Stelle sicher, dass Details-Felder existieren (aber nicht überschreiben wenn vorhanden)
-        if 'wind' not in result.get('details', {}):
-            result.setdefault('details', {})['wind'] = "Nicht verfügbar"
-        if 'thermik' not in result.get('details', {}):
-            result.setdefault('details', {})['thermik'] = "Nicht verfügbar"
-        if 'risks' not in result.get('details', {}):
-            result.setdefault('details', {})['risks'] = "Nicht verfügbar"
+        for field in _DETAIL_FIELDS:
+            details.setdefault(field, "Nicht verfügbar")
         
         result['flyable'] = bool(result.get('flyable', False))
         result['rating'] = int(result.get('rating', 0))
@@ -551,31 +1200,20 @@ class LocationEvaluator:
         # day_summary → summary Mapping (Abwärtskompatibilität mit Frontend)
         if 'day_summary' in result:
             result['summary'] = result['day_summary']
-        elif 'summary' not in result:
-            result['summary'] = "Keine Zusammenfassung verfügbar"
+        else:
+            result.setdefault('summary', "Keine Zusammenfassung verfügbar")
         
         # golden_window extrahieren
-        if 'golden_window' not in result:
-            result['golden_window'] = None
-        
-        if 'recommendation' not in result:
-            result['recommendation'] = "Keine Empfehlung verfügbar"
+        result.setdefault('golden_window', None)
+        result.setdefault('recommendation', "Keine Empfehlung verfügbar")
         
         # Parse und validiere Sektoren (neues Format, ersetzt hourly_evaluations)
-        if 'sectors' in result and isinstance(result['sectors'], list):
-            validated_sectors = []
-            for sector in result['sectors']:
-                if isinstance(sector, dict):
-                    validated = {
-                        'slot': str(sector.get('slot', '')),
-                        'safety': str(sector.get('safety', 'SAFE')).upper(),
-                        'flyable': bool(sector.get('flyable', False)),
-                        'rating': int(sector.get('rating', 0)),
-                        'wind_info': str(sector.get('wind_info', '')),
-                        'reason': str(sector.get('reason', 'Keine Begründung'))
-                    }
-                    validated_sectors.append(validated)
-            result['sectors'] = validated_sectors
+        sectors = result.get('sectors')
+        if isinstance(sectors, list):
+            result['sectors'] = [
+                {name: convert(sector.get(name, default)) for name, convert, default in _SECTOR_FIELDS}
+                for sector in sectors if isinstance(sector, dict)
+            ]
         else:
             result['sectors'] = []
         
@@ -674,29 +1312,9 @@ class LocationEvaluator:
             return f"{Colors.BOLD}{text}{Colors.RESET}" if use_colors else text
         
         conditions = result.get('conditions', 'UNKNOWN').upper()
-        condition_labels = {
-            'LEGENDARY': 'LEGENDÄR', 'GOOD': 'GUT', 'FLYABLE': 'FLIEGBAR',
-            'CAUTION': 'AUFPASSEN', 'DANGEROUS': 'GEFÄHRLICH'
-        }
-        if conditions == 'LEGENDARY':
-            condition_color = '\033[95m'  # Magenta/Purple
-            condition_icon = '🏆'
-        elif conditions == 'GOOD':
-            condition_color = Colors.GREEN
-            condition_icon = '✅'
-        elif conditions == 'FLYABLE':
-            condition_color = Colors.CYAN
-            condition_icon = '🪂'
-        elif conditions == 'CAUTION':
-            condition_color = Colors.YELLOW
-            condition_icon = '⚠️'
-        elif conditions == 'DANGEROUS':
-            condition_color = Colors.RED
-            condition_icon = '🚫'
-        else:
-            condition_color = Colors.YELLOW
-            condition_icon = '❓'
-        conditions = condition_labels.get(conditions, conditions)
+        condition_color, condition_icon, conditions = _CONDITION_STYLES.get(
+            conditions, (Colors.YELLOW, '❓', conditions)
+        )
         
         flyable = result.get('flyable', False)
         flyable_text = color("FLUGBAR", Colors.GREEN) if flyable else color("NICHT FLUGBAR", Colors.RED)
@@ -707,11 +1325,12 @@ class LocationEvaluator:
         rating_stars = '⭐' * min(rating, 10)
         rating_bar = '█' * confidence + '░' * (10 - confidence)
         
-        timestamp = result.get('timestamp', '')
-        try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            timestamp_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-        except:
+        # ISO-Zeitstempel (YYYY-MM-DDTHH:MM:SS[.ffffff][Z|+HH:MM]) per Slicing darstellen,
+        # ohne Parse/Format-Roundtrip über datetime
+        timestamp = result.get('timestamp') or ''
+        if len(timestamp) >= 19 and timestamp[10:11] == 'T':
+            timestamp_str = f"{timestamp[:10]} {timestamp[11:19]}"
+        else:
             timestamp_str = timestamp
         
         location = result.get('location', 'Unbekannt')
@@ -720,48 +1339,50 @@ class LocationEvaluator:
         details = result.get('details', {})
         recommendation = result.get('recommendation', 'Keine Empfehlung verfügbar')
         
-        lines = []
-        lines.append("╔" + "═" * 63 + "╗")
-        lines.append("║" + " " * 15 + bold("🪂 GLEITSCHIRM FLUG-TICKER") + " " * 15 + "║")
-        lines.append("╚" + "═" * 63 + "╝")
-        lines.append("")
-        lines.append(f"📍 Startplatz: {bold(location)}")
         if date:
             date_display = datetime.strptime(date, "%Y-%m-%d").strftime("%d.%m.%Y")
-            lines.append(f"📅 Tag: {date_display} ({FLIGHT_HOURS_START:02d}:00-{FLIGHT_HOURS_END:02d}:00)")
-        lines.append(f"🕐 Analyse: {timestamp_str}")
-        lines.append("")
-        lines.append("━" * 65)
-        lines.append("")
-        lines.append(f"{condition_icon} {flyable_text} - {conditions_text}")
-        lines.append("")
-        lines.append(f"Bewertung: {rating_stars} ({rating}/10)")
-        lines.append(f"Konfidenz:  {color(rating_bar, Colors.CYAN)} ({confidence}/10)")
-        lines.append("")
-        lines.append("━" * 65)
-        lines.append("")
-        lines.append(bold("📝 Zusammenfassung:"))
-        lines.append(summary)
-        lines.append("")
-        lines.append("━" * 65)
-        lines.append("")
-        lines.append(bold("💨 Wind:"))
-        lines.append(details.get('wind', 'Nicht verfügbar'))
-        lines.append("")
-        lines.append(bold("☁️ Thermik:"))
-        lines.append(details.get('thermik', 'Nicht verfügbar'))
-        lines.append("")
-        lines.append(bold("⚠️  Risiken:"))
-        lines.append(details.get('risks', 'Nicht verfügbar'))
-        lines.append("")
-        lines.append("━" * 65)
-        lines.append("")
-        lines.append(bold("💡 Empfehlung:"))
-        lines.append(recommendation)
-        lines.append("")
-        lines.append("━" * 65)
-        
-        return "\n".join(lines)
+            date_line = f"📅 Tag: {date_display} ({FLIGHT_HOURS_START:02d}:00-{FLIGHT_HOURS_END:02d}:00)\n"
+        else:
+            date_line = ""
+
+        return "\n".join([
+            _BOX_TOP,
+            "║" + " " * 15 + bold("🪂 GLEITSCHIRM FLUG-TICKER") + " " * 15 + "║",
+            _BOX_BOTTOM,
+            "",
+            f"📍 Startplatz: {bold(location)}",
+            f"{date_line}🕐 Analyse: {timestamp_str}",
+            "",
+            _SEP_LINE,
+            "",
+            f"{condition_icon} {flyable_text} - {conditions_text}",
+            "",
+            f"Bewertung: {rating_stars} ({rating}/10)",
+            f"Konfidenz:  {color(rating_bar, Colors.CYAN)} ({confidence}/10)",
+            "",
+            _SEP_LINE,
+            "",
+            bold("📝 Zusammenfassung:"),
+            summary,
+            "",
+            _SEP_LINE,
+            "",
+            bold("💨 Wind:"),
+            details.get('wind', 'Nicht verfügbar'),
+            "",
+            bold("☁️ Thermik:"),
+            details.get('thermik', 'Nicht verfügbar'),
+            "",
+            bold("⚠️  Risiken:"),
+            details.get('risks', 'Nicht verfügbar'),
+            "",
+            _SEP_LINE,
+            "",
+            bold("💡 Empfehlung:"),
+            recommendation,
+            "",
+            _SEP_LINE,
+        ])
     
     def print_result(self, result: Dict, use_colors: bool = True) -> None:
         """Gibt das Ergebnis formatiert im Terminal aus."""
@@ -785,10 +1406,20 @@ class LocationEvaluator:
             "evaluations": results
         }
         
-        # Speichere in Datei
+        # Einmal serialisieren, in eine temporäre Datei schreiben und atomar ersetzen:
+        # ein Abbruch mitten im Schreiben hinterlässt nie eine halbe evaluations.json
         try:
-            with open(evaluations_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                buf = orjson.dumps(json_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+            else:
+                buf = (json.dumps(json_data, ensure_ascii=False, indent=2) + "\n").encode('utf-8')
+
+            tmp_file = evaluations_file.with_name(evaluations_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(buf)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, evaluations_file)
             logger.info(f"Evaluierungen gespeichert in {evaluations_file}")
         except Exception as e:
             logger.error(f"Fehler beim Speichern der Evaluierungen: {e}")
@@ -798,18 +1429,26 @@ class LocationEvaluator:
 def main():
     """CLI Entry Point"""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description="Gleitschirm Flugbarkeits-Evaluierung für Uetliberg")
     parser.add_argument("--json", action="store_true", help="Ausgabe als JSON")
     parser.add_argument("--no-color", action="store_true", help="Keine Farben")
     parser.add_argument("--model", type=str, default=None, help="OpenAI Model")
     parser.add_argument("--day", type=int, default=None, help="Nur einen bestimmten Tag anzeigen (1-basiert)")
+    parser.add_argument("--batch", action="store_true", help="OpenAI Batch API nutzen (günstiger, Ergebnis kann bis zu 24h dauern)")
     
     args = parser.parse_args()
+
+    # .env erst nach dem Parsen laden (--help bleibt schnell)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
     
     try:
-        evaluator = LocationEvaluator(model=args.model)
-        results = evaluator.analyze()
+        with LocationEvaluator(model=args.model) as evaluator:
+            results = evaluator.analyze(use_batch_api=args.batch)
         
         # Filtere auf bestimmten Tag falls angegeben
         if args.day is not None:
@@ -820,7 +1459,10 @@ def main():
                 exit(1)
         
         if args.json:
-            print(json.dumps(results, indent=2, ensure_ascii=False))
+            if orjson is not None:
+                print(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8'))
+            else:
+                print(json.dumps(results, indent=2, ensure_ascii=False))
         else:
             if len(results) == 1:
                 evaluator.print_result(results[0], use_colors=not args.no_color)
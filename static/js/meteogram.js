@@ -4,6 +4,7 @@
  * Usage:
  *   Meteogram.buildTabs(container, dates, onSelectCallback)
  *   Meteogram.renderChart(chartContainer, tooltipEl, weatherDay, altWindDay, options)
+ *   Meteogram.rowsFromColumns(series)   // {time: [...], speed: [...]} -> [{time, speed}, ...]
  */
 window.Meteogram = (function () {
     'use strict';
@@ -54,6 +55,22 @@ window.Meteogram = (function () {
     const GROUND_H = GROUND_ROWS * 24;
     const TIME_LABEL_H = 28;
 
+    // ===== COLUMNAR DATA =====
+    // /api/weather liefert pro Serie parallele Spalten ({time: [...], speed: [...], ...}).
+    function rowsFromColumns(series) {
+        if (!series) return [];
+        if (Array.isArray(series)) return series;
+        var fields = Object.keys(series);
+        var n = series.time ? series.time.length : 0;
+        var rows = new Array(n);
+        for (var i = 0; i < n; i++) {
+            var row = {};
+            for (var f = 0; f < fields.length; f++) row[fields[f]] = series[fields[f]][i];
+            rows[i] = row;
+        }
+        return rows;
+    }
+
     // ===== TABS =====
     function buildTabs(container, dates, onSelect) {
         container.innerHTML = '';
@@ -129,7 +146,7 @@ window.Meteogram = (function () {
         var wxByTime = {};
         if (wxDay) {
             ['wind', 'precipitation', 'thermik', 'cloudbase'].forEach(function (key) {
-                (wxDay[key] || []).forEach(function (item) {
+                rowsFromColumns(wxDay[key]).forEach(function (item) {
                     var t = item.time;
                     if (!wxByTime[t]) wxByTime[t] = {};
                     wxByTime[t][key] = item;
@@ -475,6 +492,7 @@ window.Meteogram = (function () {
         windColor: windColor,
         arrowPath: arrowPath,
         buildTabs: buildTabs,
-        renderChart: renderChart
+        renderChart: renderChart,
+        rowsFromColumns: rowsFromColumns
     };
 })();
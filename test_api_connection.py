@@ -14,14 +14,22 @@ try:
 except ImportError:
     pass
 
+from functools import lru_cache
+
 from location_evaluator import LocationEvaluator
 
+
+@lru_cache(maxsize=1)
+def openai_api_key():
+    """OPENAI_API_KEY einmal aus der Umgebung lesen (nach load_dotenv)."""
+    return os.environ.get('OPENAI_API_KEY')
+
 print("=" * 60)
 print("API-CONNECTION TEST")
 print("=" * 60)
 
 # Prüfe API-Key
-api_key = os.environ.get('OPENAI_API_KEY')
+api_key = openai_api_key()
 if not api_key:
     print("[FEHLER] OPENAI_API_KEY nicht gesetzt!")
     print("Bitte setzen Sie die Umgebungsvariable OPENAI_API_KEY")
@@ -48,20 +56,17 @@ try:
         sys.exit(1)
     
     # Nimm ersten Tag
-    from datetime import datetime
+    # Zeitstempel sind ISO "YYYY-MM-DDTHH:MM": Datum per Slicing, ein Dict-Zugriff pro Stunde
     days_data = {}
     for timestamp, data in hourly_data.items():
-        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        date_key = dt.strftime("%Y-%m-%d")
-        if date_key not in days_data:
-            days_data[date_key] = {}
-        days_data[date_key][timestamp] = data
+        days_data.setdefault(timestamp[:10], {})[timestamp] = data
     
     if not days_data:
         print("[FEHLER] Keine Tagesdaten gefunden!")
         sys.exit(1)
     
-    first_date = sorted(days_data.keys())[0]
+    # ISO-Datumsschlüssel: lexikographisches min == chronologisch erster Tag
+    first_date = min(days_data)
     day_data = days_data[first_date]
     
     print(f"[OK] Teste mit Datum: {first_date}")
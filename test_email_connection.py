@@ -5,19 +5,36 @@ Test-Skript zum Debuggen der E-Mail-Verbindung
 
 import os
 import smtplib
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Benötigte Umgebungsvariablen: (Variable, Default, Pflichtfeld)
+EMAIL_ENV_FIELDS = (
+    ('EMAIL_SMTP_SERVER', None, True),
+    ('EMAIL_SMTP_PORT', '587', False),
+    ('EMAIL_SENDER', None, True),
+    ('EMAIL_PASSWORD', '', True),
+    ('EMAIL_RECIPIENT', None, True),
+)
+
+
+@lru_cache(maxsize=1)
+def email_config():
+    """Liest die E-Mail Konfiguration einmal aus der Umgebung (nach load_dotenv)."""
+    return {name: os.environ.get(name, default) for name, default, _ in EMAIL_ENV_FIELDS}
+
 print("=" * 60)
 print("E-Mail Konfiguration Test")
 print("=" * 60)
 
-smtp_server = os.environ.get('EMAIL_SMTP_SERVER')
-smtp_port = int(os.environ.get('EMAIL_SMTP_PORT', '587'))
-sender = os.environ.get('EMAIL_SENDER')
-password = os.environ.get('EMAIL_PASSWORD', '')
-recipient = os.environ.get('EMAIL_RECIPIENT')
+cfg = email_config()
+smtp_server = cfg['EMAIL_SMTP_SERVER']
+smtp_port = int(cfg['EMAIL_SMTP_PORT'])
+sender = cfg['EMAIL_SENDER']
+password = cfg['EMAIL_PASSWORD']
+recipient = cfg['EMAIL_RECIPIENT']
 
 print(f"\nSMTP Server: {smtp_server}")
 print(f"SMTP Port: {smtp_port}")
@@ -27,17 +44,9 @@ print(f"Password Length: {len(password)} Zeichen")
 print(f"Password has spaces: {' ' in password}")
 print(f"Password (first 4): {password[:4] if password else 'N/A'}***")
 
-if not all([smtp_server, sender, password, recipient]):
+missing = [name for name, _, required in EMAIL_ENV_FIELDS if required and not cfg[name]]
+if missing:
     print("\n[FEHLER] Nicht alle Felder sind gesetzt!")
-    missing = []
-    if not smtp_server:
-        missing.append("EMAIL_SMTP_SERVER")
-    if not sender:
-        missing.append("EMAIL_SENDER")
-    if not password:
-        missing.append("EMAIL_PASSWORD")
-    if not recipient:
-        missing.append("EMAIL_RECIPIENT")
     print(f"Fehlende Felder: {', '.join(missing)}")
     exit(1)
 
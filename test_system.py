@@ -91,7 +91,8 @@ try:
                 print(f"[OK] Wetterdaten gefunden: {key}")
                 print(f"  Stunden-Datenpunkte: {len(hourly_data)}")
                 if hourly_data:
-                    first_timestamp = sorted(hourly_data.keys())[0]
+                    # ISO-Zeitstempel: lexikographisches min == chronologisch erste Stunde
+                    first_timestamp = min(hourly_data)
                     print(f"  Erste Stunde: {first_timestamp}")
                 break
         
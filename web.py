@@ -4,12 +4,18 @@ Web-Interface Server für Uetliberg Ticker mit Zeitlinien-Diagrammen
 Flask-basiertes Interface mit D3.js Visualisierung und LLM-Auswertung
 """
 
+import gzip
+import hashlib
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file
 import config
+from json_helper import json_dumps, json_loads
 from thermik_calculator import calculate_thermal_profile, calculate_dewpoint
 from config import (
     FLIGHT_HOURS_START,
@@ -42,10 +48,41 @@ try:
 except ImportError:
     pass
 
-try:
-    from email_notifier import EmailNotifier
-except ImportError:
-    EmailNotifier = None
+_ENV_PATH = Path(__file__).parent / '.env'
+_env_mtime = None
+
+
+def _maybe_reload_env():
+    """Lädt .env mit override=True neu, aber nur wenn sich ihre mtime geändert hat."""
+    global _env_mtime
+    try:
+        mtime = os.stat(_ENV_PATH).st_mtime_ns
+    except OSError:
+        return
+    if mtime == _env_mtime:
+        return
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_ENV_PATH, override=True)  # override=True überschreibt bestehende Werte
+    except ImportError:
+        pass
+    _env_mtime = mtime
+
+
+# EmailNotifier (smtplib, email.mime) wird erst bei der ersten E-Mail-Route importiert
+_EmailNotifier = None
+
+
+def _email_notifier_class():
+    """Gibt die EmailNotifier-Klasse zurück (beim ersten Aufruf importiert) oder None."""
+    global _EmailNotifier
+    if _EmailNotifier is None:
+        try:
+            from email_notifier import EmailNotifier
+        except ImportError:
+            return None
+        _EmailNotifier = EmailNotifier
+    return _EmailNotifier
 
 try:
     from fetch_weather import fetch_weather_for_location
@@ -78,6 +115,22 @@ CACHED_WEATHER_DATA = None
 LAST_FETCH_TIME = 0
 CACHE_DURATION = 300  # 5 Minuten Cache
 
+# Cache für gruppierte Evaluierungen ({Datum: Ergebnis}), wird bei /api/trigger-update invalidiert
+CACHED_EVALUATIONS = None
+LAST_EVAL_FETCH_TIME = 0
+EVAL_CACHE_DURATION = 30  # Sekunden
+
+# Fertig serialisierte /api/weather Antwort: (LAST_FETCH_TIME, Config-Version) -> (ETag, Body)
+_WEATHER_RESPONSE_CACHE = {}
+_CONFIG_VERSION = 0  # wird bei jeder Config-Änderung erhöht
+RESPONSE_MAX_AGE = 60  # Cache-Control max-age für JSON-Antworten (Sekunden)
+
+# gzip für JSON-Antworten (nur wenn der Client es akzeptiert)
+GZIP_MIN_SIZE = 1024  # kleinere Antworten lohnen die Kompression nicht
+GZIP_LEVEL = 6
+GZIP_ETAG_SUFFIX = '-gz'  # gzip-Variante bekommt ein eigenes ETag (andere Bytes als die unkomprimierte)
+_GZIP_CACHE = {}  # gzip-ETag -> bereits komprimierter Body
+
 # Stelle sicher, dass Flask das templates-Verzeichnis findet
 # Für Vercel: Verwende absoluten Pfad zum Projekt-Root
 template_dir = Path(__file__).parent / 'templates'
@@ -88,6 +141,79 @@ if not template_dir.exists():
 app = Flask(__name__, template_folder=str(template_dir))
 
 
+@lru_cache(maxsize=4)
+def _load_json_cached(path_str, mtime_ns, size):
+    """Parst eine JSON-Datei; (mtime_ns, size) im Schlüssel invalidiert bei Änderung."""
+    return json_loads(Path(path_str).read_bytes())
+
+
+def read_json_file(path):
+    """
+    Liest eine JSON-Datei über den mtime-Cache: unveränderte Dateien werden
+    nicht erneut geparst. Das Ergebnis ist geteilt und darf nicht verändert werden.
+    """
+    st = os.stat(path)
+    return _load_json_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+def ojsonify(obj, status=200):
+    """Wie jsonify, aber mit orjson serialisiert (schneller, keine \\u-Escapes)."""
+    return Response(json_dumps(obj), status=status, mimetype='application/json')
+
+
+def _json_body(obj):
+    """Serialisiert eine Antwort einmal zu (ETag, JSON-Bytes); ETag = Inhalts-Hash."""
+    body = json_dumps(obj)
+    return hashlib.blake2b(body, digest_size=16).hexdigest(), body
+
+
+def _conditional_json_response(etag, body):
+    """JSON-Antwort mit ETag; bei passendem If-None-Match antwortet Werkzeug mit 304 ohne Body."""
+    resp = Response(body, mimetype='application/json')
+    gz_etag = f"{etag}{GZIP_ETAG_SUFFIX}"
+    if request.if_none_match.contains(gz_etag):
+        # Client hält die gzip-Variante: auch deren ETag mit 304 beantworten
+        resp.set_etag(gz_etag)
+        resp.vary.add('Accept-Encoding')
+    else:
+        resp.set_etag(etag)
+    resp.headers['Cache-Control'] = f'max-age={RESPONSE_MAX_AGE}'
+    return resp.make_conditional(request)
+
+
+@app.after_request
+def _gzip_json_response(response):
+    """Komprimiert JSON-Antworten mit gzip; Antworten mit ETag werden nur einmal komprimiert."""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers
+            or request.accept_encodings['gzip'] <= 0):
+        return response
+
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+
+    etag = response.get_etag()[0]
+    if etag and not etag.endswith(GZIP_ETAG_SUFFIX):
+        etag = f"{etag}{GZIP_ETAG_SUFFIX}"
+    compressed = _GZIP_CACHE.get(etag) if etag else None
+    if compressed is None:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        if etag:
+            if len(_GZIP_CACHE) >= 8:
+                _GZIP_CACHE.clear()
+            _GZIP_CACHE[etag] = compressed
+
+    response.set_data(compressed)
+    if etag:
+        response.set_etag(etag)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 def load_weather_data():
     """
     Laedt Wetterdaten.
@@ -150,156 +276,190 @@ def load_weather_data():
 
 
 
-def filter_flight_hours(hourly_data):
-    """Filtert Stunden-Daten auf Flugstunden."""
-    filtered = {}
-    for timestamp, data in hourly_data.items():
-        try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            hour = dt.hour
-            if FLIGHT_HOURS_START <= hour < FLIGHT_HOURS_END:
-                filtered[timestamp] = data
-        except Exception:
-            continue
-    return filtered
+@lru_cache(maxsize=8192)
+def _parse_ts(timestamp):
+    """
+    Zerlegt einen ISO-Zeitstempel einmal in (Stunde, Datum 'YYYY-MM-DD', ISO-String),
+    damit Filter, Gruppierung und Chart-Formatierung nicht je neu parsen.
+    Gecacht: dieselben Zeitstempel kommen in jeder Anfrage und jedem Endpoint wieder.
+    """
+    # Open-Meteo liefert 'YYYY-MM-DDTHH:MM' (Lokalzeit): per Slicing zerlegen, ohne datetime.
+    # isoformat() ergänzt dort nur ':00' für die Sekunden.
+    if (len(timestamp) == 16 and timestamp[4] == '-' and timestamp[7] == '-'
+            and timestamp[10] == 'T' and timestamp[13] == ':'):
+        return int(timestamp[11:13]), timestamp[:10], timestamp + ':00'
+    dt = datetime.fromisoformat(timestamp[:-1] + '+00:00' if timestamp.endswith('Z') else timestamp)
+    return dt.hour, f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}", dt.isoformat()
+
+
+# Spaltenorientierte Chart-Serien: {serie: {feld: [...]}} statt einer Liste von Dicts pro Stunde.
+# Die Feldreihenfolge ist die Reihenfolge der Werte in _append_row().
+CHART_SERIES_FIELDS = {
+    'wind': ('time', 'speed', 'gusts', 'direction'),
+    'precipitation': ('time', 'amount', 'probability'),
+    'thermik': ('time', 'cape', 'climb_rate', 'rating', 'max_height', 'diagnostics', 'data_warnings'),
+    'cloudbase': ('time', 'height', 'cover'),
+}
+
+
+def _append_row(columns, *values):
+    """Hängt eine Stunde an die parallelen Spalten einer Serie an (Reihenfolge wie CHART_SERIES_FIELDS)."""
+    for column, value in zip(columns.values(), values):
+        column.append(value)
 
 
-def group_by_days(hourly_data):
-    """Gruppiert Stunden-Daten nach Tagen."""
-    days_data = {}
-    for timestamp, data in hourly_data.items():
+def _iter_flight_hours(hourly_data):
+    """Liefert (date_key, timestamp, time_str) aller Flugstunden in chronologischer Reihenfolge."""
+    # Zeitstempel kommen bereits chronologisch: sorted() ist dann ein linearer Timsort-Durchlauf
+    for timestamp in sorted(hourly_data):
         try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            date_key = dt.strftime("%Y-%m-%d")
-            if date_key not in days_data:
-                days_data[date_key] = {}
-            days_data[date_key][timestamp] = data
+            hour, date_key, time_str = _parse_ts(timestamp)
         except Exception:
             continue
-    return days_data
+        if FLIGHT_HOURS_START <= hour < FLIGHT_HOURS_END:
+            yield date_key, timestamp, time_str
 
 
-def format_data_for_charts(hourly_data, pressure_level_data=None, elevation_ref=None, slope_azimuth=None, slope_angle=None):
-    """Formatiert Daten für D3.js Charts inkl. Physik."""
-    chart_data = {
-        'wind': [],
-        'precipitation': [],
-        'thermik': [],
-        'cloudbase': []
+def group_flight_hours_by_day(hourly_data):
+    """Filtert Stunden-Daten auf Flugstunden und gruppiert sie in einem Durchlauf nach Tagen."""
+    return {
+        date_key: {timestamp: hourly_data[timestamp] for _, timestamp, _ in hours}
+        for date_key, hours in groupby(_iter_flight_hours(hourly_data), key=itemgetter(0))
     }
-    
-    sorted_times = sorted(hourly_data.keys())
-    
-    for timestamp in sorted_times:
-        data = hourly_data[timestamp]
-        try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            time_str = dt.isoformat()
-            
-            # Wind-Daten
-            # Wetterdaten enthalten bereits die Bewegungsrichtung (wohin Wind weht)
-            # 0° = Norden, 90° = Osten, 180° = Süden, 270° = Westen
-            wind_speed = data.get('wind_speed_10m')
-            wind_gusts = data.get('wind_gusts_10m')
-            wind_direction = data.get('wind_direction_10m')
-            if wind_speed is not None and wind_direction is not None:
-                chart_data['wind'].append({
-                    'time': time_str,
-                    'speed': wind_speed,
-                    'gusts': wind_gusts if wind_gusts is not None else wind_speed,
-                    'direction': wind_direction  # Bewegungsrichtung (wohin Wind weht)
-                })
+
+
+def build_days_payload(hourly_data, pressure_level_data=None, elevation_ref=None, slope_azimuth=None, slope_angle=None):
+    """
+    Formatiert Daten für D3.js Charts inkl. Physik, direkt pro Tag.
+
+    Filter auf Flugstunden, Gruppierung nach Tagen (itertools.groupby) und
+    Formatierung laufen in einem einzigen sortierten Durchlauf über hourly_data.
+
+    Returns:
+        Tuple (days, total_hours): {date_key: {serie: {feld: [...]}}} mit den Serien und
+        Feldern aus CHART_SERIES_FIELDS (parallele Spalten) und die Anzahl Flugstunden
+    """
+    days = {}
+    total_hours = 0
+
+    # Referenzhöhe: Parameter > LOCATION-Config
+    elev_ref = elevation_ref if elevation_ref is not None else LOCATION.get('elevation_ref', 850.0)
+
+    for date_key, hours in groupby(_iter_flight_hours(hourly_data), key=itemgetter(0)):
+        chart_data = days[date_key] = {
+            series: {field: [] for field in fields}
+            for series, fields in CHART_SERIES_FIELDS.items()
+        }
+
+        for _, timestamp, time_str in hours:
+            total_hours += 1
+            data = hourly_data[timestamp]
+            try:
+                # Wind-Daten
+                # Wetterdaten enthalten bereits die Bewegungsrichtung (wohin Wind weht)
+                # 0° = Norden, 90° = Osten, 180° = Süden, 270° = Westen
+                wind_speed = data.get('wind_speed_10m')
+                wind_gusts = data.get('wind_gusts_10m')
+                wind_direction = data.get('wind_direction_10m')
+                if wind_speed is not None and wind_direction is not None:
+                    _append_row(
+                        chart_data['wind'],
+                        time_str,
+                        wind_speed,
+                        wind_gusts if wind_gusts is not None else wind_speed,
+                        wind_direction  # Bewegungsrichtung (wohin Wind weht)
+                    )
             
-            # Niederschlags-Daten
-            precipitation = data.get('precipitation', 0)
-            precip_prob = data.get('precipitation_probability', 0)
-            if precipitation is not None:
-                chart_data['precipitation'].append({
-                    'time': time_str,
-                    'amount': precipitation,
-                    'probability': precip_prob if precip_prob is not None else 0
-                })
+                # Niederschlags-Daten
+                precipitation = data.get('precipitation', 0)
+                precip_prob = data.get('precipitation_probability', 0)
+                if precipitation is not None:
+                    _append_row(
+                        chart_data['precipitation'],
+                        time_str,
+                        precipitation,
+                        precip_prob if precip_prob is not None else 0
+                    )
             
-            # Thermik-Daten (CAPE & Proxy)
-            cape = data.get('cape', 0)
+                # Thermik-Daten (CAPE & Proxy)
+                cape = data.get('cape', 0)
             
-            # Berechne Thermik-Proxy Profil für D3 Charts
-            p_levels = []
-            if pressure_level_data and timestamp in pressure_level_data:
-                for level in PRESSURE_LEVELS:
-                    h_val = pressure_level_data[timestamp].get(f'geopotential_height_{level}hPa')
-                    t_val = pressure_level_data[timestamp].get(f'temperature_{level}hPa')
-                    if h_val is not None and t_val is not None:
-                        p_levels.append({'pressure': level, 'height': h_val, 'temp': t_val})
+                # Berechne Thermik-Proxy Profil für D3 Charts
+                p_levels = []
+                if pressure_level_data and timestamp in pressure_level_data:
+                    for level in PRESSURE_LEVELS:
+                        h_val = pressure_level_data[timestamp].get(f'geopotential_height_{level}hPa')
+                        t_val = pressure_level_data[timestamp].get(f'temperature_{level}hPa')
+                        if h_val is not None and t_val is not None:
+                            p_levels.append({'pressure': level, 'height': h_val, 'temp': t_val})
                         
-            surf_temp = data.get('temperature_2m')
-            surf_dew = calculate_dewpoint(surf_temp, data.get('relative_humidity_2m', 50))
-
-            # Referenzhöhe: Parameter > LOCATION-Config
-            elev_ref = elevation_ref if elevation_ref is not None else LOCATION.get('elevation_ref', 850.0)
-
-            therm_climb = 0
-            therm_rating = 0
-            therm_max_h = None
-            therm_diagnostics = {}
-            therm_warnings = []
-            if surf_temp is not None and p_levels:
-                therm = calculate_thermal_profile(
-                    surface_temp=surf_temp,
-                    surface_dewpoint=surf_dew,
-                    elevation_m=elev_ref,
-                    pressure_levels_data=p_levels,
-                    boundary_layer_height_agl=data.get('boundary_layer_height'),
-                    sunshine_duration_s=data.get('sunshine_duration'),
-                    surface_sensible_heat_flux=data.get('surface_sensible_heat_flux'),
-                    surface_latent_heat_flux=data.get('surface_latent_heat_flux'),
-                    shortwave_radiation=data.get('shortwave_radiation'),
-                    direct_radiation=data.get('direct_radiation'),
-                    diffuse_radiation=data.get('diffuse_radiation'),
-                    soil_moisture=data.get('soil_moisture_0_to_1cm'),
-                    soil_temperature=data.get('soil_temperature_0cm'),
-                    updraft=data.get('updraft'),
-                    et0=data.get('et0_fao_evapotranspiration'),
-                    vpd=data.get('vapour_pressure_deficit'),
-                    lifted_index=data.get('lifted_index'),
-                    convective_inhibition=data.get('convective_inhibition'),
-                    snow_depth=data.get('snow_depth'),
-                    timestamp=timestamp,
-                    slope_azimuth=slope_azimuth,
-                    slope_angle=slope_angle,
-                )
-                if 'error' not in therm:
-                    therm_climb = therm['climb_rate']
-                    therm_rating = therm['rating']
-                    therm_max_h = therm['max_height']
-                    therm_diagnostics = therm.get('diagnostics', {})
-                    therm_warnings = therm.get('data_warnings', [])
-
-            if cape is not None:
-                chart_data['thermik'].append({
-                    'time': time_str,
-                    'cape': cape,
-                    'climb_rate': therm_climb,
-                    'rating': therm_rating,
-                    'max_height': therm_max_h,
-                    'diagnostics': therm_diagnostics,
-                    'data_warnings': therm_warnings,
-                })
+                surf_temp = data.get('temperature_2m')
+                surf_dew = calculate_dewpoint(surf_temp, data.get('relative_humidity_2m', 50))
+
+                therm_climb = 0
+                therm_rating = 0
+                therm_max_h = None
+                therm_diagnostics = {}
+                therm_warnings = []
+                if surf_temp is not None and p_levels:
+                    therm = calculate_thermal_profile(
+                        surface_temp=surf_temp,
+                        surface_dewpoint=surf_dew,
+                        elevation_m=elev_ref,
+                        pressure_levels_data=p_levels,
+                        boundary_layer_height_agl=data.get('boundary_layer_height'),
+                        sunshine_duration_s=data.get('sunshine_duration'),
+                        surface_sensible_heat_flux=data.get('surface_sensible_heat_flux'),
+                        surface_latent_heat_flux=data.get('surface_latent_heat_flux'),
+                        shortwave_radiation=data.get('shortwave_radiation'),
+                        direct_radiation=data.get('direct_radiation'),
+                        diffuse_radiation=data.get('diffuse_radiation'),
+                        soil_moisture=data.get('soil_moisture_0_to_1cm'),
+                        soil_temperature=data.get('soil_temperature_0cm'),
+                        updraft=data.get('updraft'),
+                        et0=data.get('et0_fao_evapotranspiration'),
+                        vpd=data.get('vapour_pressure_deficit'),
+                        lifted_index=data.get('lifted_index'),
+                        convective_inhibition=data.get('convective_inhibition'),
+                        snow_depth=data.get('snow_depth'),
+                        timestamp=timestamp,
+                        slope_azimuth=slope_azimuth,
+                        slope_angle=slope_angle,
+                    )
+                    if 'error' not in therm:
+                        therm_climb = therm['climb_rate']
+                        therm_rating = therm['rating']
+                        therm_max_h = therm['max_height']
+                        therm_diagnostics = therm.get('diagnostics', {})
+                        therm_warnings = therm.get('data_warnings', [])
+
+                if cape is not None:
+                    _append_row(
+                        chart_data['thermik'],
+                        time_str,
+                        cape,
+                        therm_climb,
+                        therm_rating,
+                        therm_max_h,
+                        therm_diagnostics,
+                        therm_warnings,
+                    )
             
-            # Wolkenbasis-Daten
-            cloud_base = data.get('cloud_base')
-            cloud_cover = data.get('cloud_cover')
+                # Wolkenbasis-Daten
+                cloud_base = data.get('cloud_base')
+                cloud_cover = data.get('cloud_cover')
             
-            if cloud_base is not None or cloud_cover is not None:
-                chart_data['cloudbase'].append({
-                    'time': time_str,
-                    'height': cloud_base,
-                    'cover': cloud_cover
-                })
-        except Exception:
-            continue
-    
-    return chart_data
+                if cloud_base is not None or cloud_cover is not None:
+                    _append_row(
+                        chart_data['cloudbase'],
+                        time_str,
+                        cloud_base,
+                        cloud_cover
+                    )
+            except Exception:
+                continue
+
+    return days, total_hours
 
 
 def format_altitude_wind_for_charts(pressure_level_data):
@@ -310,8 +470,7 @@ def format_altitude_wind_for_charts(pressure_level_data):
     for timestamp in sorted_times:
         data = pressure_level_data[timestamp]
         try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            profile = {'time': dt.isoformat(), 'levels': []}
+            profile = {'time': _parse_ts(timestamp)[2], 'levels': []}
 
             for level in PRESSURE_LEVELS:
                 height = data.get(f'geopotential_height_{level}hPa')
@@ -337,9 +496,19 @@ def format_altitude_wind_for_charts(pressure_level_data):
 
 
 def get_evaluation_data():
-    """Laedt LLM-Auswertung ausschliesslich aus InstantDB."""
+    """
+    Laedt LLM-Auswertung ausschliesslich aus InstantDB.
+    Das gruppierte Ergebnis wird EVAL_CACHE_DURATION Sekunden im Speicher gehalten
+    und darf von Aufrufern nicht veraendert werden.
+    """
+    global CACHED_EVALUATIONS, LAST_EVAL_FETCH_TIME
     import logging
+    import time
     logger = logging.getLogger(__name__)
+
+    current_time = time.time()
+    if CACHED_EVALUATIONS and (current_time - LAST_EVAL_FETCH_TIME < EVAL_CACHE_DURATION):
+        return CACHED_EVALUATIONS
     
     # InstantDB (einzige Datenquelle)
     if instantdb_load_eval:
@@ -355,6 +524,8 @@ def get_evaluation_data():
                         evaluations_by_date[date] = result
                 if evaluations_by_date:
                     logger.info("Evaluierungen aus InstantDB geladen")
+                    CACHED_EVALUATIONS = evaluations_by_date
+                    LAST_EVAL_FETCH_TIME = current_time
                     return evaluations_by_date
         except Exception as e:
             logger.error(f"InstantDB Evaluierung-Laden fehlgeschlagen: {e}")
@@ -406,9 +577,7 @@ def api_regions_data():
         path = config.get_data_dir() / "regions_forecast.json"
         if not path.exists():
             return jsonify({'error': 'Noch keine Regionen-Daten vorhanden. Bitte fetch_regions.py ausführen.'}), 404
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return jsonify(data)
+        return jsonify(read_json_file(path))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -438,19 +607,9 @@ def api_region_weather(region_id):
         pressure_level_data = raw.get('pressure_level_data', {})
         elev_ref = region.get('elevation_ref', 800)
 
-        # 3. Filtern + Gruppieren
-        flight_hours_data = filter_flight_hours(hourly_data)
-        days_data = group_by_days(flight_hours_data)
-
-        flight_hours_pl = filter_flight_hours(pressure_level_data)
-        days_pl_data = group_by_days(flight_hours_pl)
-
-        # 4. Formatieren
-        weather_days = {}
-        for date_key, day_hourly in days_data.items():
-            weather_days[date_key] = format_data_for_charts(
-                day_hourly, days_pl_data.get(date_key, {}), elevation_ref=elev_ref
-            )
+        # 3. Filtern + Gruppieren + Formatieren (ein Durchlauf)
+        weather_days, _ = build_days_payload(hourly_data, pressure_level_data, elevation_ref=elev_ref)
+        days_pl_data = group_flight_hours_by_day(pressure_level_data)
 
         alt_wind_days = {}
         for date_key, day_pl in days_pl_data.items():
@@ -521,7 +680,8 @@ def api_raw_data():
 @app.route('/api/emagramm-data')
 def api_emagramm_data():
     """Gibt Daten für das Emagramm zurück, inkl. Thermik-Berechnung für Uetliberg/Zürich."""
-    import requests as http_requests
+    from fetch_weather import SESSION as http_session
+    from concurrent.futures import ThreadPoolExecutor
     import math
     from datetime import datetime
     
@@ -557,31 +717,39 @@ def api_emagramm_data():
             "forecast_days": config.FORECAST_DAYS,
         }
         
-        response = http_requests.get(config.API_URL, params=params, timeout=config.API_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        # GFS-Supplement für BLH, LI, CIN (optional)
+        params_gfs = {
+            "latitude": lat, "longitude": lon,
+            "hourly": ",".join(config.GFS_SUPPLEMENTARY_PARAMS),
+            "models": "gfs_seamless",
+            "forecast_days": config.FORECAST_DAYS,
+            "timezone": config.TIMEZONE,
+        }
 
-        # GFS-Supplement für BLH, LI, CIN
-        gfs_hourly = {}
-        try:
-            params_gfs = {
-                "latitude": lat, "longitude": lon,
-                "hourly": ",".join(config.GFS_SUPPLEMENTARY_PARAMS),
-                "models": "gfs_seamless",
-                "forecast_days": config.FORECAST_DAYS,
-                "timezone": config.TIMEZONE,
-            }
-            resp_gfs = http_requests.get(config.API_URL, params=params_gfs, timeout=10)
+        def _fetch_gfs():
+            resp_gfs = http_session.get(config.API_URL, params=params_gfs, timeout=10)
             resp_gfs.raise_for_status()
-            gfs_data = resp_gfs.json().get("hourly", {})
-            gfs_times = gfs_data.get("time", [])
-            for i_gfs, ts in enumerate(gfs_times):
-                gfs_hourly[ts] = {}
-                for p in config.GFS_SUPPLEMENTARY_PARAMS:
-                    arr = gfs_data.get(p, [])
-                    gfs_hourly[ts][p] = arr[i_gfs] if i_gfs < len(arr) else None
-        except Exception:
-            pass  # GFS is optional
+            return resp_gfs.json().get("hourly", {})
+
+        # icon_seamless und GFS gleichzeitig abfragen (Wartezeit = langsamere Anfrage statt Summe)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            gfs_future = executor.submit(_fetch_gfs)
+
+            response = http_session.get(config.API_URL, params=params, timeout=config.API_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+
+            gfs_hourly = {}
+            try:
+                gfs_data = gfs_future.result()
+                gfs_times = gfs_data.get("time", [])
+                for i_gfs, ts in enumerate(gfs_times):
+                    gfs_hourly[ts] = {}
+                    for p in config.GFS_SUPPLEMENTARY_PARAMS:
+                        arr = gfs_data.get(p, [])
+                        gfs_hourly[ts][p] = arr[i_gfs] if i_gfs < len(arr) else None
+            except Exception:
+                pass  # GFS is optional
 
         times = data["hourly"]["time"]
         
@@ -590,8 +758,7 @@ def api_emagramm_data():
             # Finde den nächsten Zeitpunkt mit dieser Stunde (heute oder morgen)
             time_index = 0
             for idx, t in enumerate(times):
-                dt = datetime.fromisoformat(t)
-                if dt.hour == requested_hour:
+                if _parse_ts(t)[0] == requested_hour:
                     time_index = idx
                     break
         else:
@@ -675,8 +842,7 @@ def api_emagramm_data():
         # Stündliche Thermik-Übersicht für alle Flugstunden
         hourly_thermal = []
         for idx, t in enumerate(times):
-            dt = datetime.fromisoformat(t)
-            h = dt.hour
+            h, date_key, _ = _parse_ts(t)
             if h < FLIGHT_HOURS_START or h >= FLIGHT_HOURS_END:
                 continue
             
@@ -724,7 +890,7 @@ def api_emagramm_data():
                 if 'error' not in h_therm:
                     hourly_thermal.append({
                         'hour': h,
-                        'date': dt.strftime("%Y-%m-%d"),
+                        'date': date_key,
                         'timestamp': t,
                         'climb_rate': h_therm['climb_rate'],
                         'rating': h_therm['rating'],
@@ -737,7 +903,7 @@ def api_emagramm_data():
             'thermal': therm,
             'hourly_thermal': hourly_thermal,
             'timestamp': times[time_index],
-            'selected_hour': datetime.fromisoformat(times[time_index]).hour,
+            'selected_hour': _parse_ts(times[time_index])[0],
             'location': {
                 'name': LOCATION.get('name', 'Uetliberg'),
                 'lat': lat, 'lon': lon,
@@ -826,8 +992,8 @@ def api_config_apply():
         LAST_FETCH_TIME = 0
 
         # 2. Evaluate & Email
-        evaluator = LocationEvaluator(weather_json_path=weather_path)
-        analysis_results = evaluator.analyze()
+        with LocationEvaluator(weather_json_path=weather_path) as evaluator:
+            analysis_results = evaluator.analyze()
         results['steps']['evaluate'] = {'success': bool(analysis_results)}
         results['steps']['email'] = {'success': True, 'message': 'E-Mail wurde (falls konfiguriert) versendet'}
 
@@ -841,7 +1007,9 @@ def api_config_apply():
 @app.route('/api/config/reset', methods=['POST'])
 def api_config_reset():
     """Setzt die Konfiguration auf die Originalwerte zurück."""
+    global _CONFIG_VERSION
     try:
+        _CONFIG_VERSION += 1
         config.LOCATION = copy.deepcopy(_ORIGINAL_CONFIG['LOCATION'])
         config.API_URL = _ORIGINAL_CONFIG['API_URL']
         config.API_MODEL = _ORIGINAL_CONFIG['API_MODEL']
@@ -859,6 +1027,8 @@ def api_config_reset():
 
 def _apply_config(data):
     """Wendet Konfigurationsdaten auf das config-Modul an."""
+    global _CONFIG_VERSION
+    _CONFIG_VERSION += 1
     if 'location' in data:
         loc = data['location']
         if 'name' in loc: config.LOCATION['name'] = loc['name']
@@ -889,76 +1059,81 @@ def _apply_config(data):
         if 'user_prompt_template' in llm: config.LLM_USER_PROMPT_TEMPLATE = llm['user_prompt_template']
 
 
+def _build_weather_payload(weather_data):
+    """Baut die /api/weather Antwort (Tage, Thermik-Übersicht) aus den Wetterdaten."""
+    hourly_data = weather_data.get('hourly_data', {})
+    pressure_level_data = weather_data.get('pressure_level_data', {})
+    # Flugstunden filtern, nach Tagen gruppieren und formatieren in einem Durchlauf
+    days_formatted, total_hours = build_days_payload(
+        hourly_data,
+        pressure_level_data,
+        slope_azimuth=LOCATION.get('slope_azimuth'),
+        slope_angle=LOCATION.get('slope_angle')
+    )
+    
+    # Tage sind bereits chronologisch (build_days_payload gruppiert sortiert)
+    sorted_dates = list(days_formatted)
+
+    # Thermik-Übersicht pro Tag: Peak-Werte aus den stündlichen Thermik-Daten
+    thermal_overview = {}
+    for date_key, day_data in days_formatted.items():
+        therm = day_data['thermik']
+        peak_climb = 0.0
+        peak_rating = 0
+        best_hour = None
+        total_climb = 0.0
+        count = 0
+        for time_str, cr, rt in zip(therm['time'], therm['climb_rate'], therm['rating']):
+            cr = cr or 0
+            rt = rt or 0
+            if cr > peak_climb:
+                peak_climb = cr
+                best_hour = time_str
+            if rt > peak_rating:
+                peak_rating = rt
+            total_climb += cr
+            count += 1
+        avg_climb = total_climb / count if count > 0 else 0
+        thermal_overview[date_key] = {
+            'peak_climb': round(peak_climb, 1),
+            'avg_climb': round(avg_climb, 1),
+            'peak_rating': peak_rating,
+            'best_hour': best_hour,
+        }
+
+    return {
+        'success': True,
+        'location': LOCATION,
+        'flight_hours': {
+            'start': FLIGHT_HOURS_START,
+            'end': FLIGHT_HOURS_END
+        },
+        'days': days_formatted,
+        'dates': sorted_dates,
+        'thermal_overview': thermal_overview,
+        'total_hours': total_hours,
+        '_debug_source': weather_data.get('_debug_source'),
+        '_debug_path': weather_data.get('_debug_path'),
+        '_debug_timestamp': weather_data.get('_debug_timestamp')
+    }
+
+
 @app.route('/api/weather')
 def api_weather():
-    """API-Endpoint für Wetterdaten."""
+    """API-Endpoint für Wetterdaten (serialisierte Antwort gecacht, ETag/304)."""
     try:
         weather_data = load_weather_data()
-        hourly_data = weather_data.get('hourly_data', {})
-        pressure_level_data = weather_data.get('pressure_level_data', {})
-        flight_hours_data = filter_flight_hours(hourly_data)
-        
-        # Gruppiere nach Tagen
-        days_data = group_by_days(flight_hours_data)
-        
-        # Formatiere Daten für jeden Tag
-        days_formatted = {}
-        for date_key, day_hourly_data in days_data.items():
-            days_formatted[date_key] = format_data_for_charts(
-                day_hourly_data, 
-                pressure_level_data,
-                slope_azimuth=LOCATION.get('slope_azimuth'),
-                slope_angle=LOCATION.get('slope_angle')
-            )
-
-        
-        # Sortiere Tage chronologisch
-        sorted_dates = sorted(days_formatted.keys())
-
-        # Thermik-Übersicht pro Tag: Peak-Werte aus den stündlichen Thermik-Daten
-        thermal_overview = {}
-        for date_key, day_data in days_formatted.items():
-            therm_list = day_data.get('thermik', [])
-            peak_climb = 0.0
-            peak_rating = 0
-            best_hour = None
-            total_climb = 0.0
-            count = 0
-            for th in therm_list:
-                cr = th.get('climb_rate', 0) or 0
-                rt = th.get('rating', 0) or 0
-                if cr > peak_climb:
-                    peak_climb = cr
-                    best_hour = th.get('time')
-                if rt > peak_rating:
-                    peak_rating = rt
-                total_climb += cr
-                count += 1
-            avg_climb = total_climb / count if count > 0 else 0
-            thermal_overview[date_key] = {
-                'peak_climb': round(peak_climb, 1),
-                'avg_climb': round(avg_climb, 1),
-                'peak_rating': peak_rating,
-                'best_hour': best_hour,
-            }
-        
-        return jsonify({
-            'success': True,
-            'location': LOCATION,
-            'flight_hours': {
-                'start': FLIGHT_HOURS_START,
-                'end': FLIGHT_HOURS_END
-            },
-            'days': days_formatted,
-            'dates': sorted_dates,
-            'thermal_overview': thermal_overview,
-            'total_hours': len(flight_hours_data),
-            '_debug_source': weather_data.get('_debug_source'),
-            '_debug_path': weather_data.get('_debug_path'),
-            '_debug_timestamp': weather_data.get('_debug_timestamp')
-        })
+        # Nur der In-Memory-Stand ist versioniert; "keine Daten" wird nicht gecacht
+        cache_key = (LAST_FETCH_TIME, _CONFIG_VERSION) if weather_data is CACHED_WEATHER_DATA else None
+        cached = _WEATHER_RESPONSE_CACHE.get(cache_key) if cache_key else None
+        if cached is None:
+            cached = _json_body(_build_weather_payload(weather_data))
+            if cache_key:
+                _WEATHER_RESPONSE_CACHE.clear()
+                _WEATHER_RESPONSE_CACHE[cache_key] = cached
+        return _conditional_json_response(*cached)
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -998,17 +1173,17 @@ def api_evaluation():
     try:
         evaluations = get_evaluation_data()
         if evaluations:
-            return jsonify({
+            return _conditional_json_response(*_json_body({
                 'success': True,
                 'evaluations': evaluations
-            })
+            }))
         else:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Keine Auswertung verfügbar'
             }), 404
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -1035,10 +1210,7 @@ def api_evaluation_raw():
                 'last_updated': None
             })
         
-        with open(evaluations_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        return jsonify(read_json_file(evaluations_file))
     except Exception as e:
         # Gebe leeres Objekt zurück statt Fehler (Evaluierungen sind optional)
         return jsonify({
@@ -1064,8 +1236,7 @@ def api_altitude_wind():
             })
 
         # Filtere auf Flugstunden und gruppiere nach Tagen
-        flight_hours_pl = filter_flight_hours(pressure_level_data)
-        days_pl_data = group_by_days(flight_hours_pl)
+        days_pl_data = group_flight_hours_by_day(pressure_level_data)
 
         days_formatted = {}
         for date_key, day_pl_data in days_pl_data.items():
@@ -1091,19 +1262,16 @@ def api_altitude_wind():
 @app.route('/api/email-config', methods=['GET'])
 def api_email_config():
     """API-Endpoint zum Anzeigen der E-Mail-Konfiguration (ohne Passwort)."""
+    EmailNotifier = _email_notifier_class()
     if not EmailNotifier:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'E-Mail-Modul nicht verfügbar'
         }), 500
     
     try:
-        # Lade .env neu, um aktuelle Werte zu bekommen
-        try:
-            from dotenv import load_dotenv
-            load_dotenv(override=True)  # override=True überschreibt bestehende Werte
-        except ImportError:
-            pass
+        # Lade .env neu, falls sie sich seit dem letzten Aufruf geändert hat
+        _maybe_reload_env()
         
         notifier = EmailNotifier()
         config_status = notifier.check_configuration()
@@ -1128,12 +1296,12 @@ def api_email_config():
             'note': 'Wenn Werte nicht übereinstimmen, starte den Server neu!'
         }
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'config': safe_config
         })
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -1142,19 +1310,16 @@ def api_email_config():
 @app.route('/api/test-email', methods=['POST'])
 def api_test_email():
     """API-Endpoint zum Testen der E-Mail-Benachrichtigung."""
+    EmailNotifier = _email_notifier_class()
     if not EmailNotifier:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'E-Mail-Modul nicht verfügbar'
         }), 500
     
     try:
-        # Lade .env neu, um aktuelle Werte zu bekommen
-        try:
-            from dotenv import load_dotenv
-            load_dotenv(override=True)  # override=True überschreibt bestehende Werte
-        except ImportError:
-            pass
+        # Lade .env neu, falls sie sich seit dem letzten Aufruf geändert hat
+        _maybe_reload_env()
         
         notifier = EmailNotifier()
         
@@ -1165,7 +1330,7 @@ def api_test_email():
             error_msg = f'E-Mail-Konfiguration nicht vollständig. Fehlende Felder: {missing}'
             if config_status['errors']:
                 error_msg += f' Weitere Probleme: {"; ".join(config_status["errors"])}'
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': error_msg,
                 'config_status': config_status
@@ -1175,16 +1340,14 @@ def api_test_email():
         evaluations = get_evaluation_data()
         
         if not evaluations:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Keine Evaluierungsdaten verfügbar. Bitte führe zuerst eine Analyse durch (python location_evaluator.py).'
             }), 404
         
-        # Verwende die neueste Evaluierung (erste im Dictionary)
-        # Sortiere nach Datum und nimm die neueste
-        sorted_dates = sorted(evaluations.keys(), reverse=True)
-        latest_date = sorted_dates[0]
-        test_result = evaluations[latest_date]
+        # Verwende die neueste Evaluierung (ISO-Datumsschlüssel: max == neuester Tag)
+        latest_date = max(evaluations)
+        test_result = dict(evaluations[latest_date])  # Kopie: evaluations ist gecacht
         
         # Stelle sicher, dass alle benötigten Felder vorhanden sind
         if not test_result.get('conditions'):
@@ -1193,7 +1356,7 @@ def api_test_email():
         success, error_msg = notifier.send_alert(test_result, force_send=True)
         
         if success:
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'message': f'Test-E-Mail erfolgreich gesendet an {notifier.recipient}'
             })
@@ -1209,13 +1372,13 @@ def api_test_email():
             elif 'TLS' in detailed_error:
                 detailed_error += ' Tipp: Stelle sicher, dass Port 587 für TLS verwendet wird.'
             
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': detailed_error
             }), 500
             
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': f'Fehler beim Senden der Test-E-Mail: {str(e)}'
         }), 500
@@ -1250,8 +1413,8 @@ def api_cron():
         logger.info("CRON: Starte LLM-Analyse...")
         try:
             from location_evaluator import LocationEvaluator
-            evaluator = LocationEvaluator(weather_json_path='/tmp/wetterdaten.json')
-            analysis_results = evaluator.analyze()
+            with LocationEvaluator(weather_json_path='/tmp/wetterdaten.json') as evaluator:
+                analysis_results = evaluator.analyze()
             if analysis_results:
                 results['steps']['llm'] = {'success': True, 'message': f'{len(analysis_results)} Tage analysiert'}
                 logger.info(f"CRON: LLM-Analyse abgeschlossen für {len(analysis_results)} Tage")
@@ -1299,13 +1462,13 @@ def api_trigger_update():
                 results['steps']['instantdb'] = {'success': False, 'error': str(e)}
         
         # 3. Cache invalidieren
-        global CACHED_WEATHER_DATA, LAST_FETCH_TIME
+        global CACHED_WEATHER_DATA, LAST_FETCH_TIME, CACHED_EVALUATIONS, LAST_EVAL_FETCH_TIME
         CACHED_WEATHER_DATA = None
         LAST_FETCH_TIME = 0
         
         # 4. Evaluate & Email (handled by evaluator)
-        evaluator = LocationEvaluator(weather_json_path=weather_path)
-        analysis_results = evaluator.analyze()
+        with LocationEvaluator(weather_json_path=weather_path) as evaluator:
+            analysis_results = evaluator.analyze()
         results['steps']['evaluate'] = {'success': bool(analysis_results)}
         results['steps']['email'] = {'success': True, 'message': 'E-Mail wurde (falls konfiguriert) versendet'}
         
@@ -1324,9 +1487,11 @@ def api_trigger_update():
             try:
                 eval_file = get_evaluations_json_path()
                 if eval_file and eval_file.exists():
-                    with open(eval_file, 'r', encoding='utf-8') as f:
-                        eval_data = json.load(f)
+                    eval_data = json_loads(eval_file.read_bytes())
                     db_ok = instantdb_save_eval(eval_data)
+                    # Evaluierungs-Cache invalidieren
+                    CACHED_EVALUATIONS = None
+                    LAST_EVAL_FETCH_TIME = 0
                     results['steps']['instantdb_eval'] = {'success': db_ok}
                     logger.info(f"InstantDB Evaluierung-Speichern: {'OK' if db_ok else 'FEHLER'}")
             except Exception as e:
@@ -1363,6 +1528,7 @@ def api_subscribe():
         # Bestaetigungs-E-Mail senden
         email_sent = False
         email_error = None
+        EmailNotifier = _email_notifier_class()
         if EmailNotifier:
             try:
                 notifier = EmailNotifier()
@@ -1402,6 +1568,14 @@ def unsubscribe(token):
 
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Uetliberg Ticker Web-Interface')
+    parser.add_argument('--dev', action='store_true',
+                        help='Flask Entwicklungsserver mit Debug/Reloader statt waitress')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Worker-Threads für waitress (Default: 8)')
+    args = parser.parse_args()
+
     # Prüfe ob Wetterdaten vorhanden sind
     weather_file = Path("data/wetterdaten.json")
     if not weather_file.exists():
@@ -1420,5 +1594,14 @@ if __name__ == '__main__':
     print("=" * 60)
     print()
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if args.dev:
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("[WARNUNG] waitress nicht installiert (pip install waitress) - verwende Flask-Server mit Threads")
+            app.run(host='0.0.0.0', port=5000, threaded=True)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=args.threads)
 